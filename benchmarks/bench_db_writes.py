@@ -0,0 +1,67 @@
+"""
+Benchmark insert DHCP event per detik: koneksi per-call (perilaku lama)
+vs koneksi persisten WAL, dengan dan tanpa batch per tick.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_db_writes [jumlah_event]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_router import ensure_config
+
+ensure_config()
+
+from core.database import Database  # noqa: E402
+
+
+def legacy_save_dhcp_event(db_name, mac_address, ip_address, hostname, event_type, lease_time):
+    """Salinan save_dhcp_event versi lama: connect, insert, commit per event"""
+    with sqlite3.connect(db_name) as conn:
+        conn.execute(
+            "INSERT INTO dhcp_events (mac_address, ip_address, hostname, event_type, lease_time, status) VALUES (?, ?, ?, ?, ?, ?)",
+            (mac_address, ip_address, hostname, event_type, lease_time, 'pending')
+        )
+        conn.commit()
+
+
+def events(count):
+    for i in range(count):
+        yield f"AA:BB:CC:00:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}", f"10.0.{(i >> 8) & 0xFF}.{i & 0xFF}", f"host-{i}", "new", 600
+
+
+def run(label, count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count / elapsed:10.0f} insert/s  ({elapsed * 1000:8.1f} ms)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        legacy = Database(legacy_path)
+        # Perilaku lama: journal rollback default (synchronous FULL adalah default koneksi baru)
+        legacy.conn.execute("PRAGMA journal_mode=DELETE")
+        legacy.close()
+        run("per-call connect (lama)", count,
+            lambda: [legacy_save_dhcp_event(legacy_path, *ev) for ev in events(count)])
+
+        db = Database(os.path.join(tmp, "persistent.db"))
+        run("persistent WAL, per-event", count, lambda: [db.save_dhcp_event(*ev) for ev in events(count)])
+
+        def batched():
+            with db.batch():
+                for ev in events(count):
+                    db.save_dhcp_event(*ev)
+
+        run("persistent WAL, batch/tick", count, batched)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark state detector DHCP: dict JSON mentah per lease (perilaku lama)
+vs DetectorState (fingerprint + namedtuple), untuk 1k, 10k dan 50k lease.
+
+Tiap tick: expires-after semua lease turun (countdown), 1% lease diganti baru
+dan 1% lease di-renew. Diukur memori state, waktu diff, dan waktu tick penuh
+(diff + format pesan + simpan event ke DB). Versi lama membandingkan string
+expires-after ("9m41s") secara leksikografis, jadi ikut menghasilkan renew palsu.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_detector_state [jumlah_lease ...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fake_router import ensure_config
+
+ensure_config()
+
+from core.database import Database  # noqa: E402
+from core.detector import DetectorState, DhcpRecord  # noqa: E402
+
+TICK = 30
+TICKS = 10
+CHURN = 0.01
+
+# handlers.events membuat traffic.db di cwd saat di-import, jadi di-import dari direktori sementara
+_tmp = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+os.chdir(_tmp.name)
+try:
+    from handlers.events import (  # noqa: E402
+        DHCP_EVENT_FIELDS, LEASE_EXPIRY_RESOLUTION, _dhcp_items, _dhcp_record, dhcp_state, format_dhcp_event_message
+    )
+finally:
+    os.chdir(_cwd)
+
+
+def make_lease(i, expires):
+    mac = f"AA:BB:CC:{(i >> 16) & 0xFF:02X}:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}"
+    return {
+        "mac-address": mac, "address": f"10.{(i >> 16) & 0xFF}.{(i >> 8) & 0xFF}.{i & 0xFF}",
+        "host-name": f"client-{i}", "active": "true", "expires-after": f"{expires // 60}m{expires % 60}s",
+    }
+
+
+def polls(count):
+    """Hasil poll berturut-turut (list dict seperti dari router, hanya DHCP_EVENT_FIELDS)"""
+    remaining = {i: 300 + (i * 7) % 300 for i in range(count)}
+    next_id = count
+    churn = max(1, int(count * CHURN))
+    for tick in range(TICKS + 1):
+        if tick:
+            ids = list(remaining)
+            for i in ids[:churn]:
+                del remaining[i]
+                remaining[next_id] = 600
+                next_id += 1
+            for i in ids[churn:]:
+                remaining[i] -= TICK
+            for i in ids[churn:churn * 2]:
+                remaining[i] = 600
+        # Round-trip JSON supaya tiap poll punya string sendiri seperti hasil response.json()
+        yield json.loads(json.dumps([make_lease(i, expires) for i, expires in remaining.items()]))
+
+
+def legacy_diff(last, leases):
+    """Salinan logika check_dhcp_events versi lama (tanpa pesan/DB): return state baru, list event"""
+    current = {}
+    for lease in leases:
+        current[lease.get('mac-address', 'unknown')] = lease
+    events = []
+    for key, lease in current.items():
+        expires_after = lease.get('expires-after', 0)
+        if key not in last:
+            events.append((lease, "new", expires_after))
+        elif expires_after > last[key].get('expires-after', 0) and lease.get('active', False):
+            events.append((lease, "renew", expires_after))
+    for key in last:
+        if key not in current:
+            events.append((last[key], "release", None))
+    return current, [
+        (lease.get('mac-address', 'unknown'), lease.get('address', 'unknown'), lease.get('host-name', ''), event_type, lease_time)
+        for lease, event_type, lease_time in events
+    ]
+
+
+def detector_diff(state, leases, now):
+    new, changed, released = state.diff(_dhcp_items(leases, now), lambda lease: _dhcp_record(lease, now))
+    events = [(lease.mac, lease.address, lease.hostname, "new", lease.expires_after) for lease in new]
+    events += [
+        (lease.mac, lease.address, lease.hostname, "renew", lease.expires_after) for old, lease in changed
+        if lease.active and lease.expires_at - old.expires_at > LEASE_EXPIRY_RESOLUTION
+    ]
+    events += [(lease.mac, lease.address, lease.hostname, "release", None) for lease in released]
+    return events
+
+
+def emit(db, events):
+    """Bagian tick setelah diff: format pesan + simpan event ke DB dalam satu batch"""
+    with db.batch():
+        for mac, ip, hostname, event_type, lease_time in events:
+            format_dhcp_event_message(mac, ip, hostname, event_type, lease_time)
+            db.save_dhcp_event(mac, ip, hostname, event_type, lease_time)
+
+
+def state_size(build, leases):
+    """Memori yang masih dipakai state setelah hasil poll dilepas"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    state = build(json.loads(json.dumps(leases)))
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return state, size
+
+
+def new_dhcp_state():
+    return DetectorState("dhcp", DhcpRecord, dhcp_state.key_of, dhcp_state.fingerprint_of)
+
+
+def count_events(events):
+    counts = {"new": 0, "renew": 0, "release": 0}
+    for event in events:
+        counts[event[3]] += 1
+    return counts
+
+
+def run(count, db):
+    all_polls = list(polls(count))
+    base = time.time()
+
+    # Memori state setelah poll pertama (poll asli ikut dilepas, yang tersisa hanya state)
+    legacy, legacy_size = state_size(lambda leases: legacy_diff({}, leases)[0], all_polls[0])
+    detector, detector_size = state_size(lambda leases: _fill(new_dhcp_state(), leases, base), all_polls[0])
+
+    timings = {"legacy": [0.0, 0.0], "detector": [0.0, 0.0]}
+    for tick, leases in enumerate(all_polls[1:], 1):
+        start = time.perf_counter()
+        legacy, legacy_events = legacy_diff(legacy, leases)
+        diffed = time.perf_counter()
+        emit(db, legacy_events)
+        timings["legacy"][0] += diffed - start
+        timings["legacy"][1] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        detector_events = detector_diff(detector, leases, base + tick * TICK)
+        diffed = time.perf_counter()
+        emit(db, detector_events)
+        timings["detector"][0] += diffed - start
+        timings["detector"][1] += time.perf_counter() - start
+
+    print(f"{count:>6} lease")
+    for label, size, (diff_time, total_time), events in (
+        ("lama (dict mentah)", legacy_size, timings["legacy"], legacy_events),
+        ("DetectorState", detector_size, timings["detector"], detector_events),
+    ):
+        print(f"  {label:<20} state {size / 1e6:6.1f} MB | diff {diff_time / TICKS * 1000:7.1f} ms/tick"
+              f" | tick penuh {total_time / TICKS * 1000:7.1f} ms | event/tick {count_events(events)}")
+
+
+def _fill(state, leases, now):
+    detector_diff(state, leases, now)
+    return state
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    print(f"{TICKS} tick, churn {CHURN:.0%} per tick, field {DHCP_EVENT_FIELDS}")
+    db = Database(os.path.join(_tmp.name, "bench.db"))
+    for count in counts:
+        run(count, db)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark latency handler saat ada poll lambat ke router.
+
+Membandingkan:
+  - blocking : poll memakai HTTP client sinkron di dalam coroutine (perilaku lama)
+  - async    : poll memakai RouterAPI (httpx.AsyncClient persisten)
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_event_loop
+"""
+import asyncio
+import statistics
+import time
+import urllib.request
+
+from benchmarks.fake_router import FakeRouter, ensure_config
+
+ensure_config()
+
+from core.router_api import RouterAPI  # noqa: E402
+
+SLOW_POLL_SECONDS = 2.0
+HANDLER_INTERVAL = 0.05
+HANDLER_CALLS = 40
+
+
+async def blocking_poll(router):
+    # Simulasi requests.get lama: blokir event loop selama poll berjalan
+    urllib.request.urlopen(f"{router.url}/rest/interface", timeout=10).read()
+
+
+async def async_poll(api):
+    await api.get_interfaces()
+
+
+async def handler_load(api):
+    """Simulasi update Telegram yang datang tiap HANDLER_INTERVAL detik"""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(HANDLER_CALLS):
+        planned = start + i * HANDLER_INTERVAL
+        delay = planned - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await api.get_system_identity()
+        latencies.append(time.perf_counter() - planned)
+    return latencies
+
+
+async def run_scenario(router, mode):
+    api = RouterAPI(router_url=router.url)
+    await api.get_system_identity()  # warm-up koneksi
+    handler = asyncio.create_task(handler_load(api))
+    await asyncio.sleep(0.1)
+    if mode == "blocking":
+        await blocking_poll(router)
+    else:
+        await async_poll(api)
+    latencies = await handler
+    await api.aclose()
+    return latencies
+
+
+def report(mode, latencies):
+    ms = sorted(x * 1000 for x in latencies)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"{mode:<9} p50={statistics.median(ms):8.1f}ms  p95={p95:8.1f}ms  max={ms[-1]:8.1f}ms")
+
+
+def main():
+    router = FakeRouter(
+        routes={
+            "interface": [{"name": f"ether{i}", "rx-byte": "0", "tx-byte": "0"} for i in range(10)],
+            "system/identity": {"name": "bench"},
+        },
+        delays={"interface": SLOW_POLL_SECONDS},
+    ).start()
+    try:
+        print(f"Slow poll: {SLOW_POLL_SECONDS}s, {HANDLER_CALLS} handler calls tiap {HANDLER_INTERVAL * 1000:.0f}ms")
+        for mode in ("blocking", "async"):
+            report(mode, asyncio.run(run_scenario(router, mode)))
+    finally:
+        router.stop()
+
+
+if __name__ == "__main__":
+    main()
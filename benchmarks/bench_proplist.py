@@ -0,0 +1,76 @@
+"""
+Benchmark ukuran payload dan waktu parse JSON dengan/tanpa .proplist.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_proplist [jumlah_lease]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.fake_router import FakeRouter, ensure_config
+
+ensure_config()
+
+from core.router_api import RouterAPI  # noqa: E402
+
+# Sama dengan handlers.events.DHCP_EVENT_FIELDS (tidak di-import supaya tidak membuat traffic.db)
+DHCP_EVENT_FIELDS = ['mac-address', 'address', 'host-name', 'active', 'expires-after']
+
+PARSE_ROUNDS = 20
+
+
+def make_lease(i):
+    """Lease dengan property lengkap seperti output RouterOS 7"""
+    mac = f"AA:BB:CC:{(i >> 16) & 0xFF:02X}:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}"
+    return {
+        ".id": f"*{i:X}", "address": f"10.{(i >> 16) & 0xFF}.{(i >> 8) & 0xFF}.{i & 0xFF}",
+        "mac-address": mac, "client-id": f"1:{mac.lower()}", "address-lists": "",
+        "server": "dhcp1", "dhcp-option": "", "status": "bound", "expires-after": "9m41s",
+        "last-seen": "19s", "active-address": f"10.0.{(i >> 8) & 0xFF}.{i & 0xFF}",
+        "active-mac-address": mac, "active-client-id": f"1:{mac.lower()}",
+        "active-server": "dhcp1", "host-name": f"client-{i}", "radius": "false",
+        "dynamic": "true", "blocked": "false", "disabled": "false", "comment": "",
+        "age": "1d2h3m", "class-id": "android-dhcp-13", "agent-circuit-id": "",
+    }
+
+
+async def measure(api, fields):
+    url = f"{api.base_url}/ip/dhcp-server/lease"
+    params = {".proplist": ",".join(fields)} if fields else None
+    response = await api.client.get(url, params=params)
+    body = response.content
+    start = time.perf_counter()
+    for _ in range(PARSE_ROUNDS):
+        json.loads(body)
+    parse_ms = (time.perf_counter() - start) / PARSE_ROUNDS * 1000
+    return len(body), parse_ms
+
+
+async def run(router):
+    api = RouterAPI(router_url=router.url)
+    try:
+        full = await measure(api, None)
+        projected = await measure(api, DHCP_EVENT_FIELDS)
+    finally:
+        await api.aclose()
+    return full, projected
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    leases = [make_lease(i) for i in range(rows)]
+    router = FakeRouter(routes={"ip/dhcp-server/lease": leases}).start()
+    try:
+        (full_bytes, full_ms), (proj_bytes, proj_ms) = asyncio.run(run(router))
+    finally:
+        router.stop()
+    print(f"{rows} DHCP leases")
+    print(f"tanpa .proplist : {full_bytes / 1024:9.1f} KB  parse {full_ms:7.2f} ms")
+    print(f"dengan .proplist: {proj_bytes / 1024:9.1f} KB  parse {proj_ms:7.2f} ms")
+    print(f"penghematan     : {100 * (1 - proj_bytes / full_bytes):6.1f}% payload, {full_ms / proj_ms:.1f}x parse")
+
+
+if __name__ == "__main__":
+    main()
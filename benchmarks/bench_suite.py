@@ -0,0 +1,264 @@
+"""
+Benchmark suite terhadap fake MikroTik lokal (SimulatedRouter), tanpa router asli.
+
+Bagian:
+  router   : latency request RouterAPI per endpoint (cache dimatikan)
+  detector : check_dhcp_events / check_hotspot_events / check_interface_events per tick
+             (fetch + diff + simpan event + checkpoint), router dimajukan satu tick tiap putaran
+  database : throughput tulis Database (event DHCP per batch, checkpoint detector, snapshot trafik)
+  command  : render halaman /dhcp dan /hotspot, /find, dan handler /dhcp /hotspot /interface end-to-end
+             (cache RouterAPI dikosongkan tiap panggilan, jadi termasuk fetch ke router)
+
+Tiap baris: throughput (operasi/s) dan latency p50/p95/max per operasi.
+Tick detector yang gagal (failure injection) dihitung terpisah dan tidak ikut latency.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_suite [--leases N] [--sessions N] [--interfaces N] [--ticks N]
+                                     [--churn F] [--latency S] [--failure-rate F] [--only BAGIAN ...]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_router import SimulatedRouter, ensure_config
+
+ensure_config()
+
+import config  # noqa: E402
+from core.database import Database  # noqa: E402
+from core.router_api import RouterAPI  # noqa: E402
+
+SECTIONS = ("router", "detector", "database", "command")
+REQUESTS = 20
+DB_EVENTS = 20000
+RENDER_ROUNDS = 50
+
+
+class FakeMessage:
+    async def reply_text(self, text, **kwargs):
+        self.text = text
+        return self
+
+
+def report(label, samples, ops=1, failed=0):
+    """samples: durasi (detik) per putaran, ops: jumlah operasi per putaran"""
+    if not samples:
+        print(f"  {label:<40} semua gagal ({failed})")
+        return
+    ms = sorted(x * 1000 for x in samples)
+    p95 = ms[max(0, int(len(ms) * 0.95) - 1)]
+    throughput = ops * len(samples) / sum(samples) if sum(samples) else float("inf")
+    line = (f"  {label:<40} {throughput:11.0f} op/s | p50 {statistics.median(ms):8.2f} ms"
+            f" | p95 {p95:8.2f} ms | max {ms[-1]:8.2f} ms")
+    if failed:
+        line += f" | gagal {failed}"
+    print(line)
+
+
+async def timed_async(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_router(api, args):
+    from handlers.events import DHCP_EVENT_FIELDS, HOTSPOT_EVENT_FIELDS, INTERFACE_EVENT_FIELDS
+
+    print(f"router ({REQUESTS} request per endpoint)")
+    cases = (
+        ("ip/dhcp-server/lease", lambda: api.get_dhcp_leases(DHCP_EVENT_FIELDS, max_age=0), args.leases),
+        ("ip/hotspot/active", lambda: api.get_hotspot_sessions(HOTSPOT_EVENT_FIELDS, max_age=0), args.sessions),
+        ("interface (detail)", lambda: api.get_interfaces_detail(INTERFACE_EVENT_FIELDS, max_age=0), args.interfaces),
+    )
+    for label, fetch, rows in cases:
+        samples = []
+        failed = 0
+        for _ in range(REQUESTS):
+            start = time.perf_counter()
+            result = await fetch()
+            if result is None:
+                failed += 1
+            else:
+                samples.append(time.perf_counter() - start)
+        report(f"{label} [{rows} row]", samples, failed=failed)
+
+
+async def bench_detectors(api, sim, args):
+    from handlers import events
+
+    print(f"detector ({args.ticks} tick, churn {args.churn:.1%})")
+    checks = (
+        ("dhcp", events.check_dhcp_events),
+        ("hotspot", events.check_hotspot_events),
+        ("interface", events.check_interface_events),
+    )
+    # Poll pertama mengisi state dari kosong (semua entry "baru"), diukur terpisah
+    for name, check in checks:
+        start = time.perf_counter()
+        result = await check(api)
+        report(f"{name} poll pertama", [time.perf_counter() - start] if result is not None else [], failed=result is None)
+
+    results = {name: ([], 0, 0) for name, _ in checks}
+    for _ in range(args.ticks):
+        sim.advance()
+        # Antar tick di bot berjarak POLL_INTERVAL, cache RouterAPI sudah kedaluwarsa
+        api.invalidate()
+        for name, check in checks:
+            samples, failed, event_count = results[name]
+            start = time.perf_counter()
+            result = await check(api)
+            if result is None:
+                failed += 1
+            else:
+                samples.append(time.perf_counter() - start)
+                event_count += len(result)
+            results[name] = (samples, failed, event_count)
+    for name, _ in checks:
+        samples, failed, event_count = results[name]
+        ticks = len(samples) or 1
+        report(f"{name} tick ({event_count / ticks:.0f} event/tick)", samples, failed=failed)
+
+
+def bench_database(tmp):
+    print(f"database ({DB_EVENTS} operasi)")
+    db = Database(os.path.join(tmp, "bench_suite.db"))
+    batch = 500
+    rows = [
+        (f"02:00:00:00:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}", f"10.0.{(i >> 8) & 0xFF}.{i & 0xFF}", f"client-{i}", "new", 600)
+        for i in range(DB_EVENTS)
+    ]
+
+    def save_events(chunk):
+        with db.batch():
+            for row in chunk:
+                db.save_dhcp_event(*row)
+
+    chunks = [rows[i:i + batch] for i in range(0, len(rows), batch)]
+    samples = [timed(lambda chunk=chunk: save_events(chunk), 1)[0] for chunk in chunks]
+    report(f"save_dhcp_event (batch {batch})", samples, ops=batch)
+
+    def save_state(chunk, offset):
+        upserts = [(row[0], f'["{row[0]}","{row[1]}","{row[2]}",true,600,{offset}]') for row in chunk]
+        db.save_detector_state("bench", upserts)
+
+    samples = [timed(lambda chunk=chunk, i=i: save_state(chunk, i), 1)[0] for i, chunk in enumerate(chunks)]
+    report(f"save_detector_state (batch {batch})", samples, ops=batch)
+
+    names = [f"ether{i}" for i in range(50)]
+    now = int(time.time())
+    samples = timed(lambda: db.save_snapshots([(name, now, now) for name in names]), DB_EVENTS // len(names))
+    report(f"save_snapshots ({len(names)} interface)", samples, ops=len(names))
+    db.close()
+
+
+async def bench_commands(api, sim):
+    from handlers import commands, events
+    from core.client_index import client_index
+
+    leases = [
+        {key: lease.get(key) for key in commands.DHCP_FIELDS} for lease in sim.get_leases()
+    ]
+    sessions = [
+        {key: session.get(key) for key in commands.HOTSPOT_FIELDS} for session in sim.get_sessions()
+    ]
+    print(f"command ({len(leases)} lease, {len(sessions)} session, {len(client_index)} entry index)")
+
+    pages = max(1, -(-len(leases) // commands.PAGE_SIZE))
+    samples = timed(lambda: [commands.render_dhcp_page(leases, page) for page in range(min(pages, RENDER_ROUNDS))], 5)
+    report("render_dhcp_page", samples, ops=min(pages, RENDER_ROUNDS))
+    pages = max(1, -(-len(sessions) // commands.PAGE_SIZE))
+    samples = timed(lambda: [commands.render_hotspot_page(sessions, page) for page in range(min(pages, RENDER_ROUNDS))], 5)
+    report("render_hotspot_page", samples, ops=min(pages, RENDER_ROUNDS))
+    samples = timed(
+        lambda: [events.format_dhcp_event_message(row["mac-address"], row["address"], row["host-name"], "new", 600)
+                 for row in leases[:1000]], 5
+    )
+    report("format_dhcp_event_message", samples, ops=min(len(leases), 1000))
+    for query in ("10.0.1.", "client-1", leases[0]["mac-address"] if leases else "02:00:00:00:00:00"):
+        samples = timed(lambda: client_index.search(query, commands.FIND_LIMIT), RENDER_ROUNDS)
+        report(f"client_index.search({query!r})", samples)
+
+    commands.api = api
+    chat = SimpleNamespace(id=1)
+    for name, handler, args in (
+        ("/dhcp", commands.dhcp_handler, []),
+        ("/hotspot", commands.hotspot_handler, []),
+        ("/interface", commands.interface_handler, []),
+        ("/find", commands.find_handler, ["client-1"]),
+    ):
+        update = SimpleNamespace(
+            effective_user=SimpleNamespace(id=config.ALLOWED_USERS[0]),
+            effective_chat=chat,
+            callback_query=None,
+            message=FakeMessage(),
+        )
+        context = SimpleNamespace(args=args)
+
+        async def cold():
+            api.invalidate()
+            await handler(update, context)
+
+        report(f"{name} handler", await timed_async(cold, REQUESTS))
+
+
+async def run(args, tmp):
+    sim = SimulatedRouter(interfaces=args.interfaces, leases=args.leases, sessions=args.sessions, churn=args.churn)
+    router = sim.serve(latency=args.latency, failure_rate=args.failure_rate, seed=1)
+    api = RouterAPI(router_url=router.url)
+    try:
+        if "router" in args.only:
+            await bench_router(api, args)
+        if "detector" in args.only or "command" in args.only:
+            await bench_detectors(api, sim, args)
+        if "database" in args.only:
+            bench_database(tmp)
+        if "command" in args.only:
+            await bench_commands(api, sim)
+    finally:
+        await api.aclose()
+        router.stop()
+    print(f"request ke fake router: {router.request_count}, gagal (injected): {router.failure_count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite terhadap fake MikroTik lokal")
+    parser.add_argument("--leases", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--interfaces", type=int, default=24)
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--latency", type=float, default=0, help="delay per request fake router (detik)")
+    parser.add_argument("--failure-rate", type=float, default=0, help="peluang request ke fake router gagal (HTTP 500)")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=SECTIONS)
+    args = parser.parse_args()
+
+    print(f"{args.leases} lease, {args.sessions} session, {args.interfaces} interface, "
+          f"latency {args.latency * 1000:.0f} ms, failure rate {args.failure_rate:.0%}")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # handlers.* membuat traffic.db di cwd saat di-import
+        os.chdir(tmp)
+        try:
+            asyncio.run(run(args, tmp))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
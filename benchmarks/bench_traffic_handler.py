@@ -0,0 +1,93 @@
+"""
+Benchmark latency /traffic 1d terhadap jumlah interface dan panjang history.
+
+Kolom:
+  per-iface : get_past_data dipanggil sekali per interface (perilaku lama handler)
+  bulk      : satu get_past_data_bulk untuk semua interface
+  handler   : traffic_handler end-to-end (fake router lokal + bulk lookup + render)
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_traffic_handler
+"""
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_router import FakeRouter, ensure_config
+
+ensure_config()
+
+INTERFACE_COUNTS = (10, 40, 80)
+HISTORY_HOURS = (720, 8760)
+ROUNDS = 10
+
+
+class FakeMessage:
+    async def reply_text(self, text, **kwargs):
+        self.text = text
+
+
+def fill_history(db, names, hours):
+    now = int(time.time())
+    ids = db._get_interface_ids(names)
+    with db.batch():
+        for h in range(hours, 0, -1):
+            db._save_traffic_rows([(iid, now - h * 3600, h * 1000, h * 500) for iid in ids])
+
+
+def timed(fn, rounds=ROUNDS):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    import config
+    from core.database import Database
+    from core.router_api import RouterAPI
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # handlers.commands membuat Database() di cwd saat di-import
+        os.chdir(tmp)
+        from handlers import commands
+
+        print(f"{'iface':>5} {'jam':>6} {'per-iface (ms)':>15} {'bulk (ms)':>10} {'handler (ms)':>13}")
+        for count in INTERFACE_COUNTS:
+            names = [f"ether{i}" for i in range(count)]
+            rows = [{"name": name, "rx-byte": "99999999", "tx-byte": "99999999"} for name in names]
+            router = FakeRouter(routes={"interface": rows}).start()
+            for hours in HISTORY_HOURS:
+                db = Database(os.path.join(tmp, f"bench_{count}_{hours}.db"))
+                fill_history(db, names, hours)
+
+                per_iface = timed(lambda: [db.get_past_data(name, "1d") for name in names])
+                bulk = timed(lambda: db.get_past_data_bulk(names, "1d"))
+
+                async def run_handler():
+                    commands.api = RouterAPI(router_url=router.url)
+                    commands.db = db
+                    update = SimpleNamespace(
+                        effective_user=SimpleNamespace(id=config.ALLOWED_USERS[0]),
+                        message=FakeMessage()
+                    )
+                    context = SimpleNamespace(args=["1d"])
+                    await commands.traffic_handler(update, context)  # warm-up
+                    start = time.perf_counter()
+                    for _ in range(ROUNDS):
+                        await commands.traffic_handler(update, context)
+                    elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+                    await commands.api.aclose()
+                    return elapsed
+
+                handler = asyncio.run(run_handler())
+                db.close()
+                print(f"{count:>5} {hours:>6} {per_iface:>15.2f} {bulk:>10.2f} {handler:>13.2f}")
+            router.stop()
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+if __name__ == "__main__":
+    main()
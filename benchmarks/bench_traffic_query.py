@@ -0,0 +1,95 @@
+"""
+Benchmark latency get_past_data pada traffic_history besar:
+schema lama (TEXT timestamp, tanpa index) vs schema baru (epoch + interface_id, PK komposit).
+Juga mengukur durasi migrasi saat init_db.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_traffic_query [jumlah_interface] [sample_per_interface]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.fake_router import ensure_config
+
+ensure_config()
+
+from core.database import Database  # noqa: E402
+
+PERIODS = ("1h", "1d", "1m", "1y")
+QUERY_ROUNDS = 20
+
+
+def build_legacy_db(path, interfaces, samples):
+    """Isi traffic_history dengan schema lama, satu sample per jam per interface"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE traffic_history (
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            interface TEXT,
+            rx_bytes INTEGER,
+            tx_bytes INTEGER
+        )
+    ''')
+    now = datetime.now(timezone.utc)
+    rows = (
+        ((now - timedelta(hours=samples - n)).strftime('%Y-%m-%d %H:%M:%S'), f"ether{i}", n * 1000, n * 500)
+        for n in range(samples) for i in range(interfaces)
+    )
+    conn.executemany("INSERT INTO traffic_history VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def legacy_get_past_data(conn, interface, period):
+    """Query get_past_data versi lama"""
+    offsets = {"1h": 60, "1d": 1440, "1m": 43800, "1y": 525600}
+    target_time = (datetime.now() - timedelta(minutes=offsets[period])).strftime('%Y-%m-%d %H:%M:%S')
+    return conn.execute('''
+        SELECT rx_bytes, tx_bytes FROM traffic_history
+        WHERE interface = ? AND timestamp <= ?
+        ORDER BY timestamp DESC LIMIT 1
+    ''', (interface, target_time)).fetchone()
+
+
+def time_queries(fn, interfaces):
+    results = {}
+    for period in PERIODS:
+        start = time.perf_counter()
+        for n in range(QUERY_ROUNDS):
+            fn(f"ether{n % interfaces}", period)
+        results[period] = (time.perf_counter() - start) / QUERY_ROUNDS * 1000
+    return results
+
+
+def main():
+    interfaces = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 12000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traffic.db")
+        build_legacy_db(path, interfaces, samples)
+        print(f"{interfaces * samples:,} row, {interfaces} interface, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        conn = sqlite3.connect(path)
+        legacy = time_queries(lambda name, period: legacy_get_past_data(conn, name, period), interfaces)
+        conn.close()
+
+        start = time.perf_counter()
+        db = Database(path)
+        print(f"migrasi init_db: {time.perf_counter() - start:.2f} s")
+        migrated = db.conn.execute("SELECT COUNT(*) FROM traffic_history").fetchone()[0]
+        print(f"row setelah migrasi: {migrated:,}")
+
+        indexed = time_queries(db.get_past_data, interfaces)
+        db.close()
+
+    print(f"{'period':<6} {'lama (ms)':>12} {'baru (ms)':>12}")
+    for period in PERIODS:
+        print(f"{period:<6} {legacy[period]:12.3f} {indexed[period]:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Fake MikroTik REST server lokal untuk benchmark (tanpa router asli).
+
+Pakai:
+    router = FakeRouter(routes={"interface": [...]}, delays={"interface": 2.0})
+    router.start()
+    api = RouterAPI(router_url=router.url)
+    ...
+    router.stop()
+
+Atau dengan data router sintetis (interface, DHCP lease, hotspot active, file/backup):
+    sim = SimulatedRouter(leases=10000, sessions=2000, churn=0.01)
+    router = sim.serve(latency=0.02, failure_rate=0.05)
+    ...
+    sim.advance()  # satu tick: countdown lease, churn, interface up/down
+
+Jalankan standalone (Ctrl+C untuk berhenti):
+    python -m benchmarks.fake_router --leases 5000 --sessions 500 --port 8080
+"""
+import argparse
+import importlib.machinery
+import importlib.util
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def ensure_config():
+    """Load config.py, fallback ke config.py.example kalau belum ada (untuk benchmark saja)"""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    try:
+        import config  # noqa: F401
+    except ImportError:
+        path = os.path.join(REPO_ROOT, "config.py.example")
+        loader = importlib.machinery.SourceFileLoader("config", path)
+        spec = importlib.util.spec_from_loader("config", loader)
+        module = importlib.util.module_from_spec(spec)
+        loader.exec_module(module)
+        sys.modules["config"] = module
+
+
+def _apply_query(payload, query):
+    """Terapkan filter (?key=value) dan .proplist seperti RouterOS REST"""
+    proplist = query.pop(".proplist", None)
+    if not isinstance(payload, list):
+        return payload
+    rows = [row for row in payload if all(str(row.get(k)) == v for k, v in query.items())]
+    if proplist:
+        keys = proplist.split(",")
+        rows = [{k: row[k] for k in keys if k in row} for row in rows]
+    return rows
+
+
+def format_duration(seconds):
+    """Detik -> format durasi RouterOS ("1h2m3s", "9m41s", "0s")"""
+    seconds = max(0, int(seconds))
+    parts = []
+    for unit, size in (("w", 604800), ("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            parts.append(f"{seconds // size}{unit}")
+            seconds %= size
+    if seconds or not parts:
+        parts.append(f"{seconds}s")
+    return "".join(parts)
+
+
+class FakeRouter:
+    def __init__(self, routes=None, delays=None, host="127.0.0.1", port=0, actions=None, downloads=None,
+                 latency=0, jitter=0, failure_rate=0, failure_mode="error", seed=None):
+        # routes: path (tanpa /rest/) -> payload JSON atau callable() yang return payload
+        # actions: path -> callable(body) untuk POST (mis. system/backup/save), return payload
+        # downloads: callable(filename) -> bytes atau None, dipakai untuk /download?file=
+        # latency/jitter: delay tambahan (detik) untuk semua request, jitter acak 0..jitter
+        # failure_rate: peluang request gagal; failure_mode "error" = HTTP 500, "drop" = koneksi diputus
+        self.routes = dict(routes or {})
+        self.delays = dict(delays or {})
+        self.actions = dict(actions or {})
+        self.downloads = downloads
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.request_count = 0
+        self.failure_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        router = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Header dan body ditulis terpisah; tanpa ini Nagle + delayed ACK menambah ~40ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body, content_type="application/json"):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self):
+                with router._lock:
+                    router.request_count += 1
+                    failed = router.failure_rate and router._random.random() < router.failure_rate
+                    delay = router.latency + (router._random.uniform(0, router.jitter) if router.jitter else 0)
+                    if failed:
+                        router.failure_count += 1
+                parsed = urlparse(self.path)
+                path = parsed.path
+                if path.startswith("/rest/"):
+                    path = path[len("/rest/"):]
+                query = dict(parse_qsl(parsed.query))
+                body = None
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    body = json.loads(self.rfile.read(length) or b"null")
+                    if isinstance(body, dict) and ".proplist" in body:
+                        body = dict(body)
+                        proplist = body.pop(".proplist")
+                        query[".proplist"] = ",".join(proplist) if isinstance(proplist, list) else proplist
+
+                delay += router.delays.get(path, 0)
+                if delay:
+                    time.sleep(delay)
+
+                if failed:
+                    if router.failure_mode == "drop":
+                        # Putus tanpa response, seperti router yang reboot / koneksi reset
+                        self.close_connection = True
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                        return
+                    self._reply(500, {"error": 500, "message": "injected failure"})
+                    return
+
+                if path == "/download":
+                    data = router.downloads(query.get("file", "")) if router.downloads else None
+                    if data is None:
+                        self._reply(404, {"error": 404, "message": "no such file"})
+                    else:
+                        self._reply(200, data, "application/octet-stream")
+                    return
+
+                if self.command == "POST" and path in router.actions:
+                    self._reply(200, router.actions[path](body))
+                    return
+                if path not in router.routes:
+                    self._reply(404, {"error": 404, "message": "no such command"})
+                    return
+                payload = router.routes[path]
+                if callable(payload):
+                    payload = payload()
+                self._reply(200, _apply_query(payload, query))
+
+            do_GET = _handle
+            do_POST = _handle
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SimulatedRouter:
+    """
+    Data router MikroTik sintetis untuk FakeRouter.
+
+    Endpoint: interface, ip/dhcp-server/lease, ip/hotspot/active, file, system/identity,
+    system/resource, POST system/backup/save dan file/remove, serta /download.
+
+    advance() memajukan waktu simulasi satu tick: expires-after lease turun, client yang
+    sudah lewat setengah lease-time me-renew, sebagian lease/session diganti client baru
+    (churn), sebagian interface naik/turun dan counter trafik bertambah.
+    File backup baru "selesai ditulis" setelah backup_write_time detik (ukuran bertambah
+    sampai penuh), seperti router asli.
+    """
+    def __init__(self, interfaces=8, leases=1000, sessions=200, churn=0.01, tick=30, lease_time=600,
+                 backup_size=256 * 1024, backup_write_time=0.5, seed=1):
+        self.churn = churn
+        self.tick = tick
+        self.lease_time = lease_time
+        self.backup_size = backup_size
+        self.backup_write_time = backup_write_time
+        self.seed = seed
+        self.now = 0
+        self.ticks = 0
+        self.config_version = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_client = 0
+        self._next_file = 0
+        self._backup_data = {}
+
+        self.interfaces = [
+            {
+                ".id": f"*{i + 1:X}", "name": f"ether{i + 1}", "type": "ether", "running": "true",
+                "disabled": "false", "link-speed": "1Gbps", "rx-byte": 0, "tx-byte": 0,
+                "rx-error": 0, "tx-error": 0, "rx-drop": 0, "tx-drop": 0,
+            }
+            for i in range(interfaces)
+        ]
+        self.leases = {}    # mac -> lease (expires = detik simulasi absolut)
+        self.sessions = {}  # (user, mac) -> session
+        self.files = {}     # .id -> file (ready_at = time.monotonic() saat file selesai ditulis)
+        for _ in range(leases):
+            self._add_lease(self._random.randrange(self.lease_time // 2, self.lease_time))
+        for _ in range(sessions):
+            self._add_session()
+
+    def _client(self):
+        i = self._next_client
+        self._next_client += 1
+        mac = f"02:00:{(i >> 24) & 0xFF:02X}:{(i >> 16) & 0xFF:02X}:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}"
+        return i, mac, f"10.{(i >> 16) & 0xFF}.{(i >> 8) & 0xFF}.{i & 0xFF}"
+
+    def _add_lease(self, remaining=None):
+        i, mac, address = self._client()
+        self.leases[mac] = {
+            ".id": f"*{i + 1:X}", "address": address, "mac-address": mac, "host-name": f"client-{i}",
+            "status": "bound", "active": "true", "dynamic": "true",
+            "expires": self.now + (self.lease_time if remaining is None else remaining),
+        }
+
+    def _add_session(self):
+        i, mac, address = self._client()
+        self.sessions[(f"user{i}", mac)] = {
+            ".id": f"*{i + 1:X}", "name": f"user{i}", "user": f"user{i}", "address": address,
+            "mac-address": mac, "login": self.now, "bytes-in": 0, "bytes-out": 0,
+        }
+
+    def _replace_some(self, mapping, add):
+        count = int(len(mapping) * self.churn)
+        if self.churn and mapping and not count and self._random.random() < len(mapping) * self.churn:
+            count = 1
+        for key in self._random.sample(list(mapping), min(count, len(mapping))):
+            del mapping[key]
+            add()
+
+    def advance(self, ticks=1):
+        """Majukan simulasi sejumlah tick"""
+        with self._lock:
+            for _ in range(ticks):
+                self.now += self.tick
+                self.ticks += 1
+                for lease in self.leases.values():
+                    # Client renew setelah setengah lease-time (T1 DHCP)
+                    if lease["expires"] - self.now <= self.lease_time // 2:
+                        lease["expires"] = self.now + self.lease_time
+                self._replace_some(self.leases, self._add_lease)
+                self._replace_some(self.sessions, self._add_session)
+                for session in self.sessions.values():
+                    session["bytes-in"] += self._random.randrange(1 << 20)
+                    session["bytes-out"] += self._random.randrange(1 << 18)
+                for iface in self.interfaces:
+                    iface["rx-byte"] += self._random.randrange(1 << 27)
+                    iface["tx-byte"] += self._random.randrange(1 << 25)
+                    if self._random.random() < self.churn:
+                        iface["running"] = "false" if iface["running"] == "true" else "true"
+                        iface["rx-error"] += self._random.randrange(3)
+
+    def change_config(self):
+        """Konfigurasi router berubah: backup berikutnya punya isi (hash) berbeda"""
+        with self._lock:
+            self.config_version += 1
+
+    # Payload endpoint (dipanggil dari thread server)
+
+    def get_interfaces(self):
+        with self._lock:
+            return [dict(iface) for iface in self.interfaces]
+
+    def get_leases(self):
+        with self._lock:
+            now = self.now
+            rows = []
+            for lease in self.leases.values():
+                row = dict(lease)
+                row["expires-after"] = format_duration(row.pop("expires") - now)
+                rows.append(row)
+            return rows
+
+    def get_sessions(self):
+        with self._lock:
+            now = self.now
+            rows = []
+            for session in self.sessions.values():
+                row = dict(session)
+                row["uptime"] = format_duration(now - row.pop("login"))
+                rows.append(row)
+            return rows
+
+    def _file_row(self, item):
+        progress = min(1.0, (time.monotonic() - item["started"]) / self.backup_write_time) if self.backup_write_time else 1.0
+        return {".id": item[".id"], "name": item["name"], "type": "backup", "size": str(int(item["size"] * progress))}
+
+    def get_files(self):
+        with self._lock:
+            return [self._file_row(item) for item in self.files.values()]
+
+    def save_backup(self, body):
+        name = (body or {}).get("name") or "MikroTik"
+        with self._lock:
+            self._next_file += 1
+            file_id = f"*F{self._next_file:X}"
+            self.files[file_id] = {
+                ".id": file_id, "name": f"{name}.backup", "size": self.backup_size,
+                "version": self.config_version, "started": time.monotonic(),
+            }
+        return []
+
+    def remove_file(self, body):
+        with self._lock:
+            self.files.pop((body or {}).get(".id"), None)
+        return []
+
+    def download(self, filename):
+        """Isi file backup (deterministik per versi konfigurasi), None jika tidak ada / belum selesai"""
+        with self._lock:
+            for item in self.files.values():
+                if item["name"] == filename or item["name"].rsplit("/", 1)[-1] == filename:
+                    break
+            else:
+                return None
+            if self._file_row(item)["size"] != str(item["size"]):
+                return None
+            version = item["version"]
+            if version not in self._backup_data:
+                self._backup_data[version] = random.Random(f"{self.seed}-{version}").randbytes(self.backup_size)
+            return self._backup_data[version]
+
+    def routes(self):
+        return {
+            "interface": self.get_interfaces,
+            "ip/dhcp-server/lease": self.get_leases,
+            "ip/hotspot/active": self.get_sessions,
+            "file": self.get_files,
+            "system/identity": {"name": "fake-router"},
+            "system/resource": lambda: {"version": "7.14 (stable)", "board-name": "fake", "uptime": format_duration(self.now)},
+        }
+
+    def actions(self):
+        return {
+            "system/backup/save": self.save_backup,
+            "file/remove": self.remove_file,
+            # get_interfaces_detail: stats bulk ethernet (counter sudah ada di /interface)
+            "interface/ethernet/print": lambda body: self.get_interfaces(),
+        }
+
+    def serve(self, **kwargs):
+        """Jalankan FakeRouter dengan data simulasi ini, kwargs diteruskan ke FakeRouter"""
+        return FakeRouter(routes=self.routes(), actions=self.actions(), downloads=self.download, **kwargs).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake MikroTik REST server (data sintetis)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--interfaces", type=int, default=8)
+    parser.add_argument("--leases", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--churn", type=float, default=0.01, help="fraksi lease/session yang diganti per tick")
+    parser.add_argument("--tick", type=float, default=30, help="detik (waktu nyata) per tick simulasi")
+    parser.add_argument("--latency", type=float, default=0, help="delay per request (detik)")
+    parser.add_argument("--jitter", type=float, default=0, help="delay acak tambahan maksimal (detik)")
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--failure-mode", choices=("error", "drop"), default="error")
+    args = parser.parse_args()
+
+    sim = SimulatedRouter(interfaces=args.interfaces, leases=args.leases, sessions=args.sessions,
+                          churn=args.churn, tick=int(args.tick))
+    router = sim.serve(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                       failure_rate=args.failure_rate, failure_mode=args.failure_mode)
+    print(f"Fake router di {router.url} (RouterAPI(router_url=\"{router.url}\"))")
+    try:
+        while True:
+            time.sleep(args.tick)
+            sim.advance()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        router.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Replay rekaman response router (ResponseRecorder, lihat ROUTER_RECORD_FILE di config)
+melalui check_hotspot_events, check_dhcp_events dan check_interface_events secepat mungkin.
+
+Setiap response yang field-nya mencakup field detector menjadi satu tick detector, dengan
+waktu dari timestamp rekaman, jadi hasil replay deterministik: jumlah event dan digest
+(event + ringkasan per tick) selalu sama untuk rekaman yang sama. Event disimpan ke Database
+sementara, jadi jalur write DB ikut terukur.
+
+Jalankan dari root repo:
+    python -m benchmarks.replay records/router-*.jsonl.gz [--profile replay.prof] [--db replay.db]
+
+Buat rekaman sintetis dari SimulatedRouter (mis. satu hari, tick 30 detik):
+    python -m benchmarks.replay --generate records/sim-day.jsonl.gz --ticks 2880 --leases 5000
+"""
+import argparse
+import asyncio
+import cProfile
+import hashlib
+import os
+import pstats
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.fake_router import SimulatedRouter, ensure_config
+
+ensure_config()
+
+from core.recorder import ResponseRecorder, ReplayAPI, read_records  # noqa: E402
+from core.router_api import RouterAPI  # noqa: E402
+
+
+def load_detectors():
+    """path -> (nama, field yang dibutuhkan, check(api, t)); di-import setelah cwd diset (traffic.db)"""
+    from handlers import events
+
+    return {
+        "ip/hotspot/active": ("hotspot", events.HOTSPOT_EVENT_FIELDS, lambda api, t: events.check_hotspot_events(api)),
+        "ip/dhcp-server/lease": ("dhcp", events.DHCP_EVENT_FIELDS, lambda api, t: events.check_dhcp_events(api, now=t)),
+        "interface": ("interface", events.INTERFACE_EVENT_FIELDS, lambda api, t: events.check_interface_events(api)),
+    }
+
+
+def _covers(fields, required):
+    return not fields or set(required) <= set(fields)
+
+
+async def replay(records, detectors):
+    """Return (stats per detector, digest, jumlah response, (t pertama, t terakhir))"""
+    api = ReplayAPI()
+    stats = {name: {"samples": [], "events": Counter(), "failed": 0} for name, _, _ in detectors.values()}
+    digest = hashlib.sha256()
+    count = 0
+    first = last = None
+    for record in records:
+        detector = detectors.get(record["path"])
+        if detector is None or not _covers(record.get("fields"), detector[1]):
+            continue
+        name, _, check = detector
+        count += 1
+        first = record["t"] if first is None else first
+        last = record["t"]
+        api.load(record)
+        start = time.perf_counter()
+        result = await check(api, record["t"])
+        elapsed = time.perf_counter() - start
+        if result is None:
+            stats[name]["failed"] += 1
+            continue
+        stats[name]["samples"].append(elapsed)
+        # Urutan event dalam satu tick (mis. release dari selisih set) bisa beda antar proses, jadi diurutkan
+        for event_type, summary in sorted((event_type, summary) for _, event_type, summary in result):
+            stats[name]["events"][event_type] += 1
+            digest.update(f"{record['t']}|{name}|{event_type}|{summary}\n".encode())
+    await api.aclose()
+    return stats, digest.hexdigest(), count, (first, last)
+
+
+def report(stats, digest, count, span, wall):
+    first, last = span
+    recorded = (last - first) if count else 0
+    speedup = f", {recorded / wall:.0f}x real time" if recorded and wall else ""
+    print(f"{count} response, rentang rekaman {recorded / 3600:.1f} jam, replay {wall:.2f} s{speedup}")
+    for name, item in stats.items():
+        samples = item["samples"]
+        if not samples and not item["failed"]:
+            continue
+        ms = sorted(x * 1000 for x in samples) or [0.0]
+        p95 = ms[max(0, int(len(ms) * 0.95) - 1)]
+        events = ", ".join(f"{event_type} {n}" for event_type, n in sorted(item["events"].items())) or "-"
+        line = (f"  {name:<10} {len(samples):6} tick | p50 {statistics.median(ms):8.2f} ms | p95 {p95:8.2f} ms"
+                f" | max {ms[-1]:8.2f} ms | total {sum(samples):7.2f} s | {events}")
+        if item["failed"]:
+            line += f" | gagal {item['failed']}"
+        print(line)
+    print(f"digest {digest[:16]}")
+
+
+async def generate(args):
+    """Rekam args.ticks tick dari SimulatedRouter; timestamp = waktu simulasi (tick detik per tick)"""
+    sim = SimulatedRouter(interfaces=args.interfaces, leases=args.leases, sessions=args.sessions,
+                          churn=args.churn, tick=args.tick)
+    router = sim.serve()
+    api = RouterAPI(router_url=router.url)
+    recorder = ResponseRecorder(args.generate)
+    base = int(time.time()) - args.ticks * args.tick
+    detectors = load_detectors()
+    try:
+        for tick in range(args.ticks + 1):
+            if tick:
+                sim.advance()
+            for path, (_, fields, _) in detectors.items():
+                data = await api.get_resource(path, fields, max_age=0)
+                if data is not None:
+                    recorder.record(path, fields, None, data, t=base + sim.now)
+    finally:
+        recorder.close()
+        await api.aclose()
+        router.stop()
+    print(f"{recorder.records} response direkam ke {args.generate} ({os.path.getsize(args.generate) / 1e6:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay rekaman response router melalui detector event")
+    parser.add_argument("records", nargs="*", help="file rekaman (.jsonl.gz) atau pola glob")
+    parser.add_argument("--profile", metavar="FILE", help="simpan hasil cProfile replay ke FILE")
+    parser.add_argument("--db", help="database event hasil replay (default: sementara, dihapus)")
+    parser.add_argument("--generate", metavar="FILE", help="buat rekaman sintetis dari SimulatedRouter")
+    parser.add_argument("--ticks", type=int, default=2880)
+    parser.add_argument("--tick", type=int, default=30)
+    parser.add_argument("--leases", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--interfaces", type=int, default=8)
+    parser.add_argument("--churn", type=float, default=0.01)
+    args = parser.parse_args()
+    if not args.records and not args.generate:
+        parser.error("butuh file rekaman atau --generate")
+
+    records = [os.path.abspath(pattern) for pattern in args.records]
+    if args.generate:
+        args.generate = os.path.abspath(args.generate)
+    db_path = os.path.abspath(args.db) if args.db else None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # handlers.events membuat traffic.db di cwd saat di-import
+        os.chdir(tmp)
+        try:
+            if db_path:
+                from handlers import events
+                from core.database import Database
+
+                events.db = Database(db_path)
+            if args.generate:
+                asyncio.run(generate(args))
+                return
+
+            detectors = load_detectors()
+            profiler = cProfile.Profile() if args.profile else None
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            stats, digest, count, span = asyncio.run(replay(read_records(*records), detectors))
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - start
+            report(stats, digest, count, span, wall)
+            if profiler:
+                os.chdir(cwd)
+                profiler.dump_stats(args.profile)
+                pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(20)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
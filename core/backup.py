@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import secrets
+import time
+from contextlib import asynccontextmanager
+import config
+from core.router_api import api as default_api
+from core.backup_store import backup_store as default_store
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+class BackupError(Exception):
+    """Backup gagal; pesan exception ditampilkan ke user"""
+
+class BackupRunner:
+    """
+    Proses backup router: save dengan nama unik -> tunggu file selesai ditulis -> download.
+
+    Hasil download diarsipkan di BackupStore; backup['changed'] False jika isinya sama
+    dengan backup terakhir di arsip.
+
+    Hanya satu proses berjalan pada satu waktu. Request /backup yang datang saat proses
+    berjalan ikut menunggu hasil yang sama, dan file hasil download baru dihapus setelah
+    semua yang menunggu selesai memakainya.
+    """
+    def __init__(self, api=None, store=None, timeout=None, poll_interval=0.5, max_poll_interval=5, stable_polls=2):
+        self.api = api or default_api
+        self.store = store or default_store
+        self.timeout = timeout or getattr(config, 'BACKUP_TIMEOUT', 120)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.stable_polls = stable_polls
+        self.max_size = getattr(config, 'MAX_BACKUP_SIZE_MB', 50) * 1024 * 1024
+        self._task = None
+        self._users = 0
+        self._listeners = []
+        self.runs = 0
+        self.coalesced = 0
+
+    @asynccontextmanager
+    async def run(self, progress=None):
+        """
+        async with runner.run(progress) as backup: ...
+        backup = dict(name, path, size, sha256, changed, previous). progress(received, total) dipanggil saat download.
+        Raise BackupError / BackupTooLarge jika gagal.
+        """
+        if self._task is None:
+            self.runs += 1
+            self._task = asyncio.ensure_future(self._run())
+        else:
+            self.coalesced += 1
+        task = self._task
+        self._users += 1
+        if progress is not None:
+            self._listeners.append(progress)
+        try:
+            yield await asyncio.shield(task)
+        finally:
+            self._users -= 1
+            if progress in self._listeners:
+                self._listeners.remove(progress)
+            if self._users == 0 and self._task is task:
+                # Pemakai terakhir: run berikutnya membuat backup baru
+                self._task = None
+                task.add_done_callback(self._cleanup)
+
+    @staticmethod
+    def _cleanup(task):
+        """Hapus file lokal hasil run yang sudah tidak dipakai"""
+        if task.cancelled() or task.exception() is not None:
+            return
+        try:
+            os.remove(task.result()['path'])
+        except OSError:
+            pass
+
+    async def _report(self, received, total):
+        for listener in list(self._listeners):
+            await listener(received, total)
+
+    async def _run(self):
+        # Nama unik supaya tidak pernah mengambil file backup lama / milik proses lain
+        name = f"tele-{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        logging.info(f"Triggering router backup {name}...")
+        if await self.api.backup_router(name) is None:
+            if self.api.is_unreachable("system/backup/save"):
+                raise BackupError(
+                    f"Router tidak bisa dihubungi, coba lagi dalam {self.api.retry_after('system/backup/save'):.0f}s."
+                )
+            raise BackupError("Gagal memicu backup router. Pastikan router API accessible.")
+
+        backup_file = await self.wait_for_file(f"{name}.backup")
+        if backup_file is None:
+            raise BackupError(f"File backup belum selesai dibuat router setelah {self.timeout}s.")
+
+        backup = await self.api.download_backup(
+            backup_file.get('name'), max_size=self.max_size, progress=self._report
+        )
+        if backup is None:
+            raise BackupError("Gagal download backup file. Pastikan file tersedia di router.")
+        backup['name'] = backup_file.get('name')
+
+        # Arsipkan; entry terbaru sebelumnya dipakai untuk cek apakah konfigurasi berubah
+        backup['previous'] = None
+        try:
+            _, backup['previous'] = await self.store.add(backup['path'], backup['sha256'], backup['size'], backup['name'])
+        except Exception as e:
+            logging.error(f"❌ Gagal menyimpan backup ke arsip: {e}")
+        previous = backup['previous']
+        backup['changed'] = previous is None or previous[2] != backup['sha256']
+
+        # File sudah di lokal, hapus dari router supaya storage router tidak penuh
+        if backup_file.get('.id'):
+            await self.api.post_resource("file/remove", {".id": backup_file['.id']})
+        return backup
+
+    async def wait_for_file(self, filename):
+        """
+        Poll daftar file router (backoff eksponensial) sampai filename muncul dan ukurannya
+        tidak berubah selama stable_polls poll berturut-turut. Return dict file, None jika timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        delay = self.poll_interval
+        last_size = None
+        stable = 0
+        while True:
+            files = await self.api.get_backup_files(['.id', 'name', 'size'])
+            found = None
+            for item in files or []:
+                # Di beberapa device file ada di sub-folder (mis. flash/), cocokkan akhir nama
+                if item.get('name', '').rsplit('/', 1)[-1] == filename:
+                    found = item
+                    break
+
+            if found is not None:
+                size = _to_int(found.get('size'))
+                if size > 0 and size == last_size:
+                    stable += 1
+                    if stable >= self.stable_polls:
+                        return found
+                else:
+                    stable = 0
+                last_size = size
+
+            if time.monotonic() + delay > deadline:
+                return None
+            await asyncio.sleep(delay)
+            # Setelah file muncul cukup poll dengan interval awal untuk cek ukuran stabil
+            delay = self.poll_interval if found is not None else min(self.max_poll_interval, delay * 2)
+
+# Runner bersama untuk command /backup
+backup_runner = BackupRunner()
@@ -0,0 +1,103 @@
+import asyncio
+import gzip
+import logging
+import lzma
+import os
+import shutil
+import time
+import config
+
+# Kompresi yang didukung: nama -> (ekstensi object, fungsi open)
+COMPRESSORS = {
+    "xz": (".xz", lzma.open),
+    "gzip": (".gz", gzip.open),
+}
+
+class BackupStore:
+    """
+    Arsip backup lokal yang dialamatkan dengan hash konten (SHA-256).
+
+    File disimpan terkompresi sekali per hash di <root>/<sha[:2]>/<sha>.backup.<ext>;
+    backup yang isinya sama dengan yang sudah ada hanya menambah entry di database.
+    Retensi: simpan backup terbaru untuk keep_daily hari dan keep_monthly bulan terakhir.
+
+    db: Database bersama untuk entry arsip. Instance bersama backup_store dibuat tanpa db
+    (supaya import tidak membuka koneksi baru), main.py memasang koneksi DB-nya sendiri.
+    """
+    def __init__(self, db=None, root=None, compression=None, keep_daily=None, keep_monthly=None):
+        self.db = db
+        self.root = root or getattr(config, 'BACKUP_STORE_DIR', 'backups')
+        self.compression = compression or getattr(config, 'BACKUP_COMPRESSION', 'xz')
+        if self.compression not in COMPRESSORS:
+            raise ValueError(f"Kompresi backup tidak dikenal: {self.compression}")
+        self.keep_daily = keep_daily if keep_daily is not None else getattr(config, 'BACKUP_KEEP_DAILY', 7)
+        self.keep_monthly = keep_monthly if keep_monthly is not None else getattr(config, 'BACKUP_KEEP_MONTHLY', 12)
+
+    def latest(self):
+        """Entry terbaru (id, created_at, sha256, size, object, stored_size, name) atau None"""
+        entries = self.db.get_backup_entries(limit=1)
+        return entries[0] if entries else None
+
+    async def add(self, path, sha256, size, name=None):
+        """
+        Arsipkan file backup hasil download.
+        Return (entry_id, previous): previous = entry terbaru sebelum backup ini (None jika
+        arsip kosong); isi backup tidak berubah jika previous[2] == sha256.
+        """
+        previous = self.latest()
+        object_name = self.db.get_backup_object(sha256)
+        if object_name is None or not os.path.exists(os.path.join(self.root, object_name)):
+            # Kompresi bisa makan waktu beberapa detik, jalankan di thread
+            object_name = await asyncio.to_thread(self._store_object, path, sha256)
+        else:
+            logging.info(f"Backup {sha256[:12]} sudah ada di arsip, tidak disimpan ulang")
+        stored_size = os.path.getsize(os.path.join(self.root, object_name))
+        entry_id = self.db.save_backup_entry(sha256, size, object_name, stored_size, name)
+        self.prune()
+        return entry_id, previous
+
+    def _store_object(self, path, sha256):
+        """Kompres file ke object store (tulis ke file sementara lalu rename atomik)"""
+        extension, open_compressed = COMPRESSORS[self.compression]
+        object_name = os.path.join(sha256[:2], f"{sha256}.backup{extension}")
+        target = os.path.join(self.root, object_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp = f"{target}.tmp"
+        with open(path, 'rb') as source, open_compressed(temp, 'wb') as destination:
+            shutil.copyfileobj(source, destination, 1024 * 1024)
+        os.replace(temp, target)
+        return object_name
+
+    def prune(self):
+        """
+        Terapkan retensi: backup terbaru per hari untuk keep_daily hari terakhir dan
+        per bulan untuk keep_monthly bulan terakhir (yang punya backup). Return jumlah entry dihapus.
+        """
+        days = set()
+        months = set()
+        remove = []
+        for entry_id, created_at, *_ in self.db.get_backup_entries():
+            t = time.localtime(created_at)
+            day = (t.tm_year, t.tm_mon, t.tm_mday)
+            month = (t.tm_year, t.tm_mon)
+            keep = False
+            if day not in days and len(days) < self.keep_daily:
+                days.add(day)
+                keep = True
+            if month not in months and len(months) < self.keep_monthly:
+                months.add(month)
+                keep = True
+            if not keep:
+                remove.append(entry_id)
+
+        for object_name in self.db.delete_backup_entries(remove):
+            try:
+                os.remove(os.path.join(self.root, object_name))
+            except OSError:
+                pass
+        if remove:
+            logging.info(f"Retensi backup: {len(remove)} entry lama dihapus")
+        return len(remove)
+
+# Arsip bersama untuk /backup dan job backup terjadwal (db dipasang di main.py)
+backup_store = BackupStore()
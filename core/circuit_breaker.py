@@ -0,0 +1,81 @@
+import logging
+import time
+import config
+from core.metrics import metrics
+
+class CircuitBreaker:
+    """
+    Circuit breaker per endpoint router.
+
+    - closed    : request normal; failure_threshold kegagalan berturut-turut -> open
+    - open      : request langsung ditolak (fail fast) selama open_for detik
+    - half_open : setelah open_for habis, satu request percobaan dilewatkan;
+                  sukses -> closed, gagal -> open lagi dengan open_for dua kali lipat
+                  (maksimal max_reset_timeout)
+    Kegagalan = router tidak bisa dihubungi / timeout / HTTP 5xx, bukan error 4xx.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, max_reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or getattr(config, 'ROUTER_CIRCUIT_FAILURES', 3)
+        self.reset_timeout = reset_timeout or getattr(config, 'ROUTER_CIRCUIT_RESET', 30)
+        self.max_reset_timeout = max(self.reset_timeout, max_reset_timeout or getattr(config, 'ROUTER_CIRCUIT_MAX_RESET', 300))
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_for = self.reset_timeout
+        self._probing = False
+        self._probe_started = 0.0
+
+    def retry_after(self):
+        """Sisa detik sampai request percobaan berikutnya diizinkan (0 jika tidak open)"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_for - time.monotonic())
+
+    def allow(self):
+        """True jika request boleh dijalankan sekarang"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        # Half-open: hanya satu request percobaan pada satu waktu (kecuali percobaan
+        # sebelumnya tidak pernah melapor, mis. task dibatalkan)
+        now = time.monotonic()
+        if self._probing and now - self._probe_started < self.reset_timeout:
+            return False
+        self._probing = True
+        self._probe_started = now
+        return True
+
+    def success(self):
+        if self.state != self.CLOSED:
+            logging.info(f"✅ Router endpoint {self.name} pulih, circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.open_for = self.reset_timeout
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            # Percobaan gagal: buka lagi dengan jeda lebih lama
+            self._open(min(self.max_reset_timeout, self.open_for * 2))
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self._open(self.reset_timeout)
+
+    def _open(self, open_for):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.open_for = open_for
+        self._probing = False
+        metrics.inc("router_circuit_open_total", path=self.name)
+        logging.warning(
+            f"⚠️ Router endpoint {self.name} gagal {self.failures}x, circuit open {open_for:.0f}s (request ditolak langsung)"
+        )
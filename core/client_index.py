@@ -0,0 +1,130 @@
+import re
+from bisect import bisect_left, insort
+
+_FULL_IPV4 = re.compile(r'^\d{1,3}(\.\d{1,3}){3}$')
+_IP_PREFIX = re.compile(r'^[\d.]+$')
+_FULL_MAC = re.compile(r'^[0-9A-F]{2}(:[0-9A-F]{2}){5}$')
+
+# Jumlah entry baru dalam satu update yang diproses dengan append + sort
+BULK_THRESHOLD = 256
+
+def normalize_mac(mac):
+    return (mac or '').strip().upper().replace('-', ':')
+
+class ClientIndex:
+    """
+    Index client (DHCP lease + hotspot session) di memori untuk /find.
+
+    - by_mac / by_ip : dict untuk pencarian MAC dan IP persis
+    - ips / names    : list terurut (nilai, entry id) untuk pencarian prefix IP dan
+                       hostname/username dengan bisect
+
+    Diisi dari hasil diff detector (new/changed/removed), jadi biaya update sebanding
+    dengan jumlah perubahan, bukan jumlah client.
+    """
+    def __init__(self):
+        self.entries = {}  # (source, key) -> record
+        self.by_mac = {}   # MAC -> set entry id
+        self.by_ip = {}    # IP -> set entry id
+        self.ips = []      # [(ip, entry id)] terurut
+        self.names = []    # [(hostname/username lowercase, entry id)] terurut
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _fields(record):
+        """(mac, ip, name) dari DhcpRecord / HotspotRecord"""
+        name = getattr(record, 'hostname', None) or getattr(record, 'name', None) or ''
+        return normalize_mac(record.mac), record.address or '', name.lower()
+
+    def apply(self, state, new, changed, removed):
+        """Terapkan hasil DetectorState.diff() untuk state (dhcp / hotspot)"""
+        source = state.name
+        for record in removed:
+            self._remove((source, state.key_of(record)))
+        for old, record in changed:
+            entry_id = (source, state.key_of(record))
+            if self._fields(old) == self._fields(record):
+                # Field yang di-index sama (mis. hanya expires berubah), cukup ganti record
+                self.entries[entry_id] = record
+                continue
+            self._remove(entry_id)
+            self._add(entry_id, record)
+        # Banyak entry baru sekaligus (poll pertama / restore): append lalu sort sekali,
+        # bukan insort satu per satu yang O(n) per entry
+        bulk = len(new) > BULK_THRESHOLD
+        for record in new:
+            entry_id = (source, state.key_of(record))
+            self._remove(entry_id)
+            self._add(entry_id, record, bulk)
+        if bulk:
+            self.ips.sort()
+            self.names.sort()
+
+    def _add(self, entry_id, record, bulk=False):
+        mac, ip, name = self._fields(record)
+        self.entries[entry_id] = record
+        self.by_mac.setdefault(mac, set()).add(entry_id)
+        add_sorted = list.append if bulk else insort
+        if ip:
+            self.by_ip.setdefault(ip, set()).add(entry_id)
+            add_sorted(self.ips, (ip, entry_id))
+        if name:
+            add_sorted(self.names, (name, entry_id))
+
+    def _remove(self, entry_id):
+        record = self.entries.pop(entry_id, None)
+        if record is None:
+            return
+        mac, ip, name = self._fields(record)
+        self._discard(self.by_mac, mac, entry_id)
+        if ip:
+            self._discard(self.by_ip, ip, entry_id)
+            self._delete_sorted(self.ips, (ip, entry_id))
+        if name:
+            self._delete_sorted(self.names, (name, entry_id))
+
+    @staticmethod
+    def _discard(mapping, value, entry_id):
+        ids = mapping.get(value)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del mapping[value]
+
+    @staticmethod
+    def _delete_sorted(items, item):
+        i = bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
+
+    @staticmethod
+    def _prefix_matches(items, prefix):
+        i = bisect_left(items, (prefix,))
+        while i < len(items) and items[i][0].startswith(prefix):
+            yield items[i][1]
+            i += 1
+
+    def search(self, query, limit=20):
+        """
+        Cari client: MAC lengkap / IP lengkap (persis), prefix IP, atau prefix hostname/username.
+        Return (total, [(source, record)]) maksimal limit hasil.
+        """
+        query = query.strip()
+        mac = normalize_mac(query)
+        if _FULL_MAC.match(mac):
+            ids = sorted(self.by_mac.get(mac, ()))
+        elif _FULL_IPV4.match(query):
+            ids = sorted(self.by_ip.get(query, ()))
+        else:
+            ids = []
+            if _IP_PREFIX.match(query):
+                ids = list(self._prefix_matches(self.ips, query))
+            if not ids:
+                # Hostname bisa juga berupa angka, jadi tetap dicari di nama jika prefix IP kosong
+                ids = list(self._prefix_matches(self.names, query.lower()))
+        return len(ids), [(entry_id[0], self.entries[entry_id]) for entry_id in ids[:limit]]
+
+# Index bersama: diisi detector (handlers/events.py), dibaca /find
+client_index = ClientIndex()
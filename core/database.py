@@ -1,22 +1,65 @@
+import logging
 import sqlite3
-from datetime import datetime, timedelta
+import time
+from contextlib import contextmanager
+from functools import wraps
+import config
+from core.metrics import metrics, DB_BUCKETS
+
+# Versi schema (PRAGMA user_version). 0 = traffic_history lama (TEXT timestamp, tanpa index),
+# 1 = traffic_history terindex, 2 = + tabel rollup
+SCHEMA_VERSION = 2
+
+# Tabel rollup trafik: (nama tabel, resolusi dalam detik, retensi dalam hari / None = selamanya).
+# Tiap bucket menyimpan sample terakhir di dalam bucket tersebut.
+TRAFFIC_ROLLUPS = (
+    ("traffic_minute", 60, 3),
+    ("traffic_hour", 3600, 180),
+    ("traffic_day", 86400, 1825),
+    ("traffic_month", 30 * 86400, None),
+)
+
+# Period /traffic -> menit
+PERIOD_MINUTES = {"1h": 60, "1d": 1440, "1m": 43800, "1y": 525600}
+
+# Rollup dipilih jika resolusinya <= period / ROLLUP_PRECISION (error baseline maks ~8%)
+ROLLUP_PRECISION = 12
+
+def _timed(method):
+    """Catat durasi method Database ke histogram db_query_duration_seconds{operation=<nama method>}"""
+    histogram = metrics.histogram("db_query_duration_seconds", DB_BUCKETS, operation=method.__name__)
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
 
 class Database:
     def __init__(self, db_name="traffic.db"):
         self.db_name = db_name
+        # Satu koneksi persisten untuk semua query, statement yang sama di-cache oleh sqlite3
+        self.conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=256)
+        self._batch_depth = 0
+        self._interface_ids = {}  # Cache nama interface -> id
+        # Sample mentah lebih tua dari ini dihapus oleh prune_traffic_history()
+        self.raw_retention_days = getattr(config, 'TRAFFIC_RAW_RETENTION_DAYS', 7)
         self.init_db()
 
     def init_db(self):
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS traffic_history (
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    interface TEXT,
-                    rx_bytes INTEGER,
-                    tx_bytes INTEGER
-                )
-            ''')
-            
+        conn = self.conn
+        # WAL: reader tidak ter-block writer, synchronous NORMAL: fsync hanya saat checkpoint
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-8000")  # ~8MB page cache
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        self._migrate_traffic_history()
+
+        with conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS hotspot_sessions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -55,95 +98,461 @@ class Database:
                     details TEXT
                 )
             ''')
-            
-            conn.commit()
 
-    def save_snapshot(self, interface, rx, tx):
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "INSERT INTO traffic_history (interface, rx_bytes, tx_bytes) VALUES (?, ?, ?)",
-                (interface, rx, tx)
+            # Checkpoint state detector (satu record JSON per entry), dimuat ulang saat startup
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS detector_state (
+                    detector TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    PRIMARY KEY (detector, key)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS detector_checkpoints (
+                    detector TEXT PRIMARY KEY,
+                    updated_at INTEGER NOT NULL
+                )
+            ''')
+
+            # Arsip backup lokal; file disimpan terkompresi di disk per hash konten (object),
+            # beberapa entry bisa menunjuk object yang sama
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS backup_archive (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER,
+                    object TEXT NOT NULL,
+                    stored_size INTEGER,
+                    name TEXT
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_backup_archive_sha256 ON backup_archive (sha256)")
+
+    def _create_traffic_tables(self):
+        conn = self.conn
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS interfaces (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
             )
+        ''')
+
+        # timestamp = epoch detik (UTC). Primary key (interface_id, timestamp) sekaligus
+        # menjadi index untuk lookup "sample terakhir sebelum waktu X" per interface
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS traffic_history (
+                interface_id INTEGER NOT NULL REFERENCES interfaces(id),
+                timestamp INTEGER NOT NULL,
+                rx_bytes INTEGER,
+                tx_bytes INTEGER,
+                PRIMARY KEY (interface_id, timestamp)
+            ) WITHOUT ROWID
+        ''')
+
+    def _create_rollup_tables(self):
+        for table, _, _ in TRAFFIC_ROLLUPS:
+            # bucket = awal bucket (epoch), timestamp = waktu sample terakhir di bucket
+            self.conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    interface_id INTEGER NOT NULL REFERENCES interfaces(id),
+                    bucket INTEGER NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    rx_bytes INTEGER,
+                    tx_bytes INTEGER,
+                    PRIMARY KEY (interface_id, bucket)
+                ) WITHOUT ROWID
+            ''')
+
+    def _migrate_traffic_history(self):
+        """
+        Buat tabel trafik, atau migrasi traffic_history versi lama
+        (timestamp TEXT + nama interface per row). Row lama dengan interface dan detik
+        yang sama digabung (primary key baru), yang disimpan row terakhir.
+        """
+        conn = self.conn
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_to_indexed_history()
+        if version < 2:
+            self._migrate_to_rollups()
+
+    def _migrate_to_indexed_history(self):
+        conn = self.conn
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(traffic_history)")]
+
+        conn.execute("BEGIN")
+        try:
+            if 'interface' in columns:
+                conn.execute("ALTER TABLE traffic_history RENAME TO traffic_history_legacy")
+                self._create_traffic_tables()
+                conn.execute('''
+                    INSERT OR IGNORE INTO interfaces (name)
+                    SELECT DISTINCT interface FROM traffic_history_legacy WHERE interface IS NOT NULL
+                ''')
+                legacy_rows = conn.execute('''
+                    SELECT COUNT(*) FROM traffic_history_legacy
+                    WHERE interface IS NOT NULL AND strftime('%s', timestamp) IS NOT NULL
+                ''').fetchone()[0]
+                conn.execute('''
+                    INSERT OR REPLACE INTO traffic_history (interface_id, timestamp, rx_bytes, tx_bytes)
+                    SELECT i.id, CAST(strftime('%s', l.timestamp) AS INTEGER), l.rx_bytes, l.tx_bytes
+                    FROM traffic_history_legacy l
+                    JOIN interfaces i ON i.name = l.interface
+                    WHERE strftime('%s', l.timestamp) IS NOT NULL
+                    ORDER BY l.rowid
+                ''')
+                migrated = conn.execute("SELECT COUNT(*) FROM traffic_history").fetchone()[0]
+                conn.execute("DROP TABLE traffic_history_legacy")
+                logging.info(
+                    f"Migrasi traffic_history: {legacy_rows} row lama -> {migrated} row "
+                    f"({legacy_rows - migrated} row dengan interface dan detik yang sama digabung)"
+                )
+            else:
+                self._create_traffic_tables()
+            conn.execute("PRAGMA user_version = 1")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _migrate_to_rollups(self):
+        """Buat tabel rollup dan isi dari traffic_history yang sudah ada"""
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            self._create_rollup_tables()
+            for table, resolution, _ in TRAFFIC_ROLLUPS:
+                # MAX(timestamp) membuat SQLite mengambil rx/tx dari row sample terakhir di bucket
+                conn.execute(f'''
+                    INSERT OR REPLACE INTO {table} (interface_id, bucket, timestamp, rx_bytes, tx_bytes)
+                    SELECT interface_id, timestamp / {resolution} * {resolution} AS bucket,
+                           MAX(timestamp), rx_bytes, tx_bytes
+                    FROM traffic_history
+                    GROUP BY interface_id, bucket
+                ''')
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
 
+    def _get_interface_ids(self, names):
+        """Ambil (atau buat) id untuk nama-nama interface"""
+        missing = [name for name in names if name not in self._interface_ids]
+        if missing:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO interfaces (name) VALUES (?)",
+                [(name,) for name in missing]
+            )
+            placeholders = ','.join('?' * len(missing))
+            cursor = self.conn.execute(
+                f"SELECT name, id FROM interfaces WHERE name IN ({placeholders})",
+                missing
+            )
+            self._interface_ids.update(cursor.fetchall())
+        return [self._interface_ids[name] for name in names]
+
+    def close(self):
+        """Commit sisa transaksi dan tutup koneksi"""
+        self.conn.commit()
+        self.conn.close()
+
+    @contextmanager
+    def batch(self):
+        """
+        Gabungkan semua write di dalam blok menjadi satu transaksi (satu commit).
+        Dipakai per tick detector supaya ratusan event tidak commit satu per satu.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._commit()
+
+    def _commit(self):
+        """Commit transaksi, durasinya dicatat sebagai operation="commit"""
+        started = time.perf_counter()
+        self.conn.commit()
+        metrics.observe("db_query_duration_seconds", time.perf_counter() - started, DB_BUCKETS, operation="commit")
+
+    def _write(self, sql, params=()):
+        """Jalankan statement write, commit langsung kecuali sedang di dalam batch()"""
+        self.conn.execute(sql, params)
+        if self._batch_depth == 0:
+            self._commit()
+
+    def _save_traffic_rows(self, rows):
+        """Simpan sample (interface_id, timestamp, rx, tx) ke tabel mentah dan semua rollup"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO traffic_history (interface_id, timestamp, rx_bytes, tx_bytes) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        for table, resolution, _ in TRAFFIC_ROLLUPS:
+            self.conn.executemany(
+                f'''
+                INSERT INTO {table} (interface_id, bucket, timestamp, rx_bytes, tx_bytes)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (interface_id, bucket) DO UPDATE SET
+                    timestamp = excluded.timestamp,
+                    rx_bytes = excluded.rx_bytes,
+                    tx_bytes = excluded.tx_bytes
+                WHERE excluded.timestamp >= {table}.timestamp
+                ''',
+                [(interface_id, ts - ts % resolution, ts, rx, tx) for interface_id, ts, rx, tx in rows]
+            )
+        if self._batch_depth == 0:
+            self._commit()
+
+    @_timed
+    def save_snapshot(self, interface, rx, tx):
+        interface_id, = self._get_interface_ids([interface])
+        self._save_traffic_rows([(interface_id, int(time.time()), rx, tx)])
+
+    @_timed
+    def save_snapshots(self, snapshots, timestamp=None):
+        """
+        Simpan snapshot semua interface dalam satu transaksi.
+        snapshots: iterable of (interface, rx, tx). Semua row memakai timestamp yang sama
+        (default: sekarang), timestamp tersebut (epoch detik) dikembalikan sebagai ID snapshot.
+        """
+        snapshots = list(snapshots)
+        snapshot_time = int(time.time() if timestamp is None else timestamp)
+        interface_ids = self._get_interface_ids([interface for interface, _, _ in snapshots])
+        self._save_traffic_rows(
+            [(interface_id, snapshot_time, rx, tx)
+             for interface_id, (_, rx, tx) in zip(interface_ids, snapshots)]
+        )
+        return snapshot_time
+
+    def _traffic_sources(self, minutes):
+        """
+        Urutan tabel yang dicoba untuk lookup baseline: rollup paling kasar yang masih cukup
+        presisi untuk period ini, lalu rollup yang lebih halus, terakhir tabel mentah.
+        """
+        max_resolution = minutes * 60 // ROLLUP_PRECISION
+        rollups = [table for table, resolution, _ in TRAFFIC_ROLLUPS if resolution <= max_resolution]
+        return list(reversed(rollups)) + ["traffic_history"]
+
+    @_timed
     def get_past_data(self, interface, period):
-        # Mapping period ke menit
-        offsets = {"1h": 60, "1d": 1440, "1m": 43800, "1y": 525600}
-        minutes = offsets.get(period, 60)
-        
-        target_time = (datetime.now() - timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S')
+        return self.get_past_data_bulk([interface], period).get(interface)
+
+    @_timed
+    def get_past_data_bulk(self, interfaces, period):
+        """
+        Ambil baseline (rx, tx) pada atau sebelum waktu target untuk banyak interface sekaligus.
+        Return dict nama interface -> (rx_bytes, tx_bytes); interface tanpa data tidak ada di dict.
+        """
+        minutes = PERIOD_MINUTES.get(period, 60)
         
-        with sqlite3.connect(self.db_name) as conn:
-            # Mencari data yang paling mendekati target_time
-            cursor = conn.execute('''
-                SELECT rx_bytes, tx_bytes FROM traffic_history 
-                WHERE interface = ? AND timestamp <= ? 
-                ORDER BY timestamp DESC LIMIT 1
-            ''', (interface, target_time))
-            return cursor.fetchone()
+        target_time = int(time.time()) - minutes * 60
+
+        result = {}
+        remaining = list(dict.fromkeys(interfaces))
+        # Biasanya selesai di tabel pertama (satu query); tabel berikutnya hanya untuk
+        # interface yang belum punya data di tabel yang lebih kasar
+        for table in self._traffic_sources(minutes):
+            if not remaining:
+                break
+            placeholders = ','.join('?' * len(remaining))
+            # Subquery berkorelasi memakai primary key tiap interface (seek, bukan scan
+            # seluruh history seperti ROW_NUMBER() OVER (PARTITION BY ...))
+            if table == "traffic_history":
+                sql = f'''
+                    SELECT i.name, t.rx_bytes, t.tx_bytes
+                    FROM interfaces i
+                    JOIN traffic_history t ON t.interface_id = i.id AND t.timestamp = (
+                        SELECT timestamp FROM traffic_history
+                        WHERE interface_id = i.id AND timestamp <= ?
+                        ORDER BY timestamp DESC LIMIT 1
+                    )
+                    WHERE i.name IN ({placeholders})
+                '''
+                params = [target_time, *remaining]
+            else:
+                sql = f'''
+                    SELECT i.name, t.rx_bytes, t.tx_bytes
+                    FROM interfaces i
+                    JOIN {table} t ON t.interface_id = i.id AND t.bucket = (
+                        SELECT bucket FROM {table}
+                        WHERE interface_id = i.id AND bucket <= ? AND timestamp <= ?
+                        ORDER BY bucket DESC LIMIT 1
+                    )
+                    WHERE i.name IN ({placeholders})
+                '''
+                params = [target_time, target_time, *remaining]
+            for name, rx, tx in self.conn.execute(sql, params):
+                result[name] = (rx, tx)
+            remaining = [name for name in remaining if name not in result]
+        return result
+
+    @_timed
+    def prune_traffic_history(self):
+        """
+        Hapus sample mentah yang lebih tua dari raw_retention_days dan bucket rollup
+        yang melewati retensinya. Return jumlah row yang dihapus.
+        """
+        now = int(time.time())
+        interface_ids = [row[0] for row in self.conn.execute("SELECT id FROM interfaces")]
+        targets = [("traffic_history", "timestamp", self.raw_retention_days)]
+        targets += [(table, "bucket", days) for table, _, days in TRAFFIC_ROLLUPS if days is not None]
+
+        deleted = 0
+        for table, column, days in targets:
+            cutoff = now - days * 86400
+            # Hapus per interface supaya memakai primary key (interface_id, ...)
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"DELETE FROM {table} WHERE interface_id = ? AND {column} < ?",
+                [(interface_id, cutoff) for interface_id in interface_ids]
+            )
+            deleted += self.conn.total_changes - before
+        if self._batch_depth == 0:
+            self._commit()
+        return deleted
 
+    @_timed
     def save_hotspot_login(self, username, mac_address, ip_address):
         """Simpan hotspot login event"""
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "INSERT INTO hotspot_sessions (username, mac_address, ip_address, status) VALUES (?, ?, ?, ?)",
-                (username, mac_address, ip_address, 'active')
-            )
-            conn.commit()
+        self._write(
+            "INSERT INTO hotspot_sessions (username, mac_address, ip_address, status) VALUES (?, ?, ?, ?)",
+            (username, mac_address, ip_address, 'active')
+        )
 
+    @_timed
     def save_hotspot_logout(self, username, mac_address):
         """Update hotspot logout event"""
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "UPDATE hotspot_sessions SET logout_time = CURRENT_TIMESTAMP, status = ? WHERE username = ? AND mac_address = ? AND status = ?",
-                ('inactive', username, mac_address, 'active')
-            )
-            conn.commit()
+        self._write(
+            "UPDATE hotspot_sessions SET logout_time = CURRENT_TIMESTAMP, status = ? WHERE username = ? AND mac_address = ? AND status = ?",
+            ('inactive', username, mac_address, 'active')
+        )
 
+    @_timed
     def save_dhcp_event(self, mac_address, ip_address, hostname, event_type, lease_time):
         """Simpan DHCP event"""
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "INSERT INTO dhcp_events (mac_address, ip_address, hostname, event_type, lease_time, status) VALUES (?, ?, ?, ?, ?, ?)",
-                (mac_address, ip_address, hostname, event_type, lease_time, 'pending')
-            )
-            conn.commit()
+        self._write(
+            "INSERT INTO dhcp_events (mac_address, ip_address, hostname, event_type, lease_time, status) VALUES (?, ?, ?, ?, ?, ?)",
+            (mac_address, ip_address, hostname, event_type, lease_time, 'pending')
+        )
 
+    @_timed
     def get_recent_hotspot_sessions(self, limit=10):
         """Ambil recent hotspot sessions"""
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute('''
-                SELECT username, mac_address, ip_address, login_time, logout_time, status 
-                FROM hotspot_sessions 
-                ORDER BY login_time DESC LIMIT ?
-            ''', (limit,))
-            return cursor.fetchall()
+        cursor = self.conn.execute('''
+            SELECT username, mac_address, ip_address, login_time, logout_time, status 
+            FROM hotspot_sessions 
+            ORDER BY login_time DESC LIMIT ?
+        ''', (limit,))
+        return cursor.fetchall()
 
+    @_timed
     def get_recent_dhcp_events(self, limit=10):
         """Ambil recent DHCP events"""
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute('''
-                SELECT mac_address, ip_address, hostname, event_type, event_time, lease_time 
-                FROM dhcp_events 
-                ORDER BY event_time DESC LIMIT ?
-            ''', (limit,))
-            return cursor.fetchall()
+        cursor = self.conn.execute('''
+            SELECT mac_address, ip_address, hostname, event_type, event_time, lease_time 
+            FROM dhcp_events 
+            ORDER BY event_time DESC LIMIT ?
+        ''', (limit,))
+        return cursor.fetchall()
 
+    @_timed
     def save_interface_event(self, interface_name, event_type, status, speed=None, rx_error=0, tx_error=0, details=None):
         """Simpan interface event"""
-        with sqlite3.connect(self.db_name) as conn:
-            conn.execute(
-                "INSERT INTO interface_events (interface_name, event_type, status, speed, rx_error, tx_error, details) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (interface_name, event_type, status, speed, rx_error, tx_error, details)
-            )
-            conn.commit()
+        self._write(
+            "INSERT INTO interface_events (interface_name, event_type, status, speed, rx_error, tx_error, details) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (interface_name, event_type, status, speed, rx_error, tx_error, details)
+        )
 
+    @_timed
     def get_recent_interface_events(self, limit=20):
         """Ambil recent interface events"""
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute('''
-                SELECT interface_name, event_type, status, speed, rx_error, tx_error, event_time, details 
-                FROM interface_events 
-                ORDER BY event_time DESC LIMIT ?
-            ''', (limit,))
-            return cursor.fetchall()
\ No newline at end of file
+        cursor = self.conn.execute('''
+            SELECT interface_name, event_type, status, speed, rx_error, tx_error, event_time, details 
+            FROM interface_events 
+            ORDER BY event_time DESC LIMIT ?
+        ''', (limit,))
+        return cursor.fetchall()
+
+    @_timed
+    def save_detector_state(self, detector, upserts, deletes=()):
+        """
+        Checkpoint perubahan state detector setelah satu tick.
+        upserts: list (key, record_json) yang baru/berubah, deletes: list key yang hilang.
+        """
+        if upserts:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO detector_state (detector, key, record) VALUES (?, ?, ?)",
+                [(detector, key, record) for key, record in upserts]
+            )
+        if deletes:
+            self.conn.executemany(
+                "DELETE FROM detector_state WHERE detector = ? AND key = ?",
+                [(detector, key) for key in deletes]
+            )
+        self._write(
+            "INSERT OR REPLACE INTO detector_checkpoints (detector, updated_at) VALUES (?, ?)",
+            (detector, int(time.time()))
+        )
+
+    @_timed
+    def get_detector_state(self, detector):
+        """Return (updated_at, list record_json) checkpoint terakhir, (None, []) jika belum ada"""
+        row = self.conn.execute(
+            "SELECT updated_at FROM detector_checkpoints WHERE detector = ?", (detector,)
+        ).fetchone()
+        if row is None:
+            return None, []
+        cursor = self.conn.execute("SELECT record FROM detector_state WHERE detector = ?", (detector,))
+        return row[0], [record for record, in cursor]
+
+    @_timed
+    def clear_detector_state(self, detector):
+        """Hapus checkpoint detector (mis. karena sudah terlalu lama)"""
+        self.conn.execute("DELETE FROM detector_state WHERE detector = ?", (detector,))
+        self._write("DELETE FROM detector_checkpoints WHERE detector = ?", (detector,))
+
+    @_timed
+    def save_backup_entry(self, sha256, size, object_name, stored_size, name=None, created_at=None):
+        """Simpan entry arsip backup, return id"""
+        cursor = self.conn.execute(
+            "INSERT INTO backup_archive (created_at, sha256, size, object, stored_size, name) VALUES (?, ?, ?, ?, ?, ?)",
+            (int(created_at or time.time()), sha256, size, object_name, stored_size, name)
+        )
+        if self._batch_depth == 0:
+            self._commit()
+        return cursor.lastrowid
+
+    @_timed
+    def get_backup_entries(self, limit=None):
+        """Entry arsip backup dari yang terbaru: list (id, created_at, sha256, size, object, stored_size, name)"""
+        sql = "SELECT id, created_at, sha256, size, object, stored_size, name FROM backup_archive ORDER BY created_at DESC, id DESC"
+        if limit:
+            return self.conn.execute(sql + " LIMIT ?", (limit,)).fetchall()
+        return self.conn.execute(sql).fetchall()
+
+    @_timed
+    def get_backup_object(self, sha256):
+        """Nama object yang sudah tersimpan untuk hash ini, None jika belum ada"""
+        row = self.conn.execute(
+            "SELECT object FROM backup_archive WHERE sha256 = ? LIMIT 1", (sha256,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @_timed
+    def delete_backup_entries(self, ids):
+        """Hapus entry arsip, return nama object yang tidak dipakai entry lain lagi"""
+        if not ids:
+            return []
+        placeholders = ','.join('?' * len(ids))
+        objects = {row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT object FROM backup_archive WHERE id IN ({placeholders})", ids
+        )}
+        self.conn.execute(f"DELETE FROM backup_archive WHERE id IN ({placeholders})", ids)
+        if self._batch_depth == 0:
+            self._commit()
+        used = {row[0] for row in self.conn.execute("SELECT DISTINCT object FROM backup_archive")}
+        return sorted(objects - used)
\ No newline at end of file
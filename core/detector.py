@@ -0,0 +1,141 @@
+import json
+import re
+from collections import namedtuple
+
+# Satuan durasi RouterOS, mis. "1w2d3h4m5s"
+_DURATION_UNITS = {'w': 604800, 'd': 86400, 'h': 3600, 'm': 60, 's': 1}
+_DURATION_PART = re.compile(r'(\d+)([wdhms])')
+
+# Cache hasil parse: nilai expires-after banyak yang sama antar lease dan antar tick
+_duration_cache = {}
+
+def parse_duration(value):
+    """Durasi RouterOS ("9m41s", "1d2h", 600) -> detik (int), 0 jika tidak valid"""
+    seconds = _duration_cache.get(value)
+    if seconds is not None:
+        return seconds
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not value:
+        return 0
+    text = str(value).strip()
+    if text.isdigit():
+        seconds = int(text)
+    else:
+        # Bagian pecahan detik (mis. "1m2s300ms") diabaikan
+        text = re.sub(r'\d+(ms|us|ns)', '', text)
+        seconds = sum(int(n) * _DURATION_UNITS[unit] for n, unit in _DURATION_PART.findall(text))
+    if len(_duration_cache) >= 65536:
+        _duration_cache.clear()
+    _duration_cache[value] = seconds
+    return seconds
+
+# Nilai boolean dari REST API ("true"/"false" sebagai string, kadang bool asli)
+TRUE_VALUES = frozenset(('true', 'yes', True))
+
+def to_bool(value):
+    """REST API mengirim boolean sebagai string "true"/"false" """
+    if isinstance(value, str):
+        value = value.lower()
+    return value in TRUE_VALUES
+
+# Record state per entry: tuple tetap, bukan dict JSON mentah dari router
+HotspotRecord = namedtuple('HotspotRecord', ['name', 'mac', 'address'])
+DhcpRecord = namedtuple('DhcpRecord', ['mac', 'address', 'hostname', 'active', 'expires_after', 'expires_at'])
+InterfaceRecord = namedtuple('InterfaceRecord', ['name', 'status', 'disabled', 'speed', 'rx_error', 'tx_error'])
+
+class DetectorState:
+    """
+    State satu detector: key -> record ringkas (namedtuple) plus fingerprint konten.
+
+    diff() membandingkan poll baru dengan state lama dalam satu pass. Fingerprint dihitung
+    dari row mentah, jadi row yang tidak berubah tidak perlu diubah jadi record lagi;
+    record hanya dibuat untuk entry baru dan entry yang fingerprint-nya berbeda.
+
+    key_of dan fingerprint_of menghitung key/fingerprint dari record, dipakai saat state
+    di-restore dari checkpoint. Hasilnya harus sama dengan yang dihitung dari row mentah.
+    """
+    def __init__(self, name, record_type, key_of, fingerprint_of):
+        self.name = name
+        self.record_type = record_type
+        self.key_of = key_of
+        self.fingerprint_of = fingerprint_of
+        self.records = {}
+        self.fingerprints = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def diff(self, items, make_record):
+        """
+        items: iterable (key, fingerprint, row) dari poll terbaru.
+        make_record: fungsi row -> record, hanya dipanggil untuk entry baru/berubah.
+        Return (new, changed, removed):
+          new     : list record yang belum ada di state
+          changed : list (record_lama, record_baru) yang fingerprint-nya berbeda
+          removed : list record lama yang tidak ada lagi di poll
+        State diganti dengan hasil poll ini.
+        """
+        old_records = self.records
+        old_fingerprints = self.fingerprints
+        records = {}
+        fingerprints = {}
+        new = []
+        changed = []
+
+        for key, fingerprint, row in items:
+            if key in records:
+                # Key dobel di satu poll (mis. MAC yang sama di dua DHCP server):
+                # row pertama yang dipakai, supaya state stabil antar poll
+                continue
+            old_fingerprint = old_fingerprints.get(key)
+            if old_fingerprint == fingerprint:
+                records[key] = old_records[key]
+            else:
+                record = records[key] = make_record(row)
+                if old_fingerprint is None:
+                    new.append(record)
+                else:
+                    changed.append((old_records[key], record))
+            fingerprints[key] = fingerprint
+
+        # Semua key lama masih ada jika jumlah key sama setelah dikurangi key baru
+        if len(records) - len(new) == len(old_records):
+            removed = []
+        else:
+            removed = [old_records[key] for key in old_records.keys() - records.keys()]
+
+        self.records = records
+        self.fingerprints = fingerprints
+        return new, changed, removed
+
+    def storage_key(self, record):
+        """Key record sebagai string untuk checkpoint di database"""
+        key = self.key_of(record)
+        return key if isinstance(key, str) else json.dumps(key)
+
+    def checkpoint(self, new, changed, removed):
+        """
+        Perubahan dari satu diff() dalam bentuk siap simpan:
+        (upserts [(key, record_json)], deletes [key]) untuk Database.save_detector_state.
+        """
+        upserts = [(self.storage_key(record), json.dumps(record)) for record in new]
+        upserts += [(self.storage_key(record), json.dumps(record)) for _, record in changed]
+        deletes = [self.storage_key(record) for record in removed]
+        return upserts, deletes
+
+    def restore(self, rows):
+        """Isi state dari record JSON checkpoint tanpa menghasilkan event"""
+        records = {}
+        fingerprints = {}
+        for row in rows:
+            record = self.record_type._make(json.loads(row))
+            key = self.key_of(record)
+            records[key] = record
+            fingerprints[key] = self.fingerprint_of(record)
+        self.records = records
+        self.fingerprints = fingerprints
+
+    def clear(self):
+        self.records = {}
+        self.fingerprints = {}
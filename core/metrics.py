@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from functools import wraps
+import config
+
+# Batas bucket histogram (detik): request router / job / notifikasi, dan query DB
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+# Keterangan metric untuk baris # HELP di endpoint Prometheus
+METRIC_HELP = {
+    "router_requests_total": "Request REST ke router per path, method dan status",
+    "router_request_duration_seconds": "Durasi request REST ke router",
+    "router_response_bytes_total": "Byte response dari router",
+    "router_cache_total": "Lookup get_resource: hit/miss cache dan coalesced (single-flight)",
+    "router_retries_total": "GET yang diulang setelah gagal (backoff dengan jitter)",
+    "router_circuit_open_total": "Circuit breaker endpoint router berpindah ke open",
+    "router_circuit_state": "State circuit breaker per endpoint (0 = closed, 1 = half-open, 2 = open)",
+    "job_runs_total": "Run job polling per hasil (changed/unchanged/failed)",
+    "job_duration_seconds": "Durasi run job",
+    "job_lag_seconds": "Keterlambatan mulai job dari jadwal",
+    "job_interval_seconds": "Interval job saat ini (scheduler adaptif)",
+    "db_query_duration_seconds": "Durasi operasi Database per method (commit = commit transaksi)",
+    "notifications_total": "Notifikasi per hasil (sent/failed/retried)",
+    "notification_send_duration_seconds": "Durasi panggilan send_message ke Telegram",
+    "notification_delivery_seconds": "Waktu dari notifikasi diantrikan sampai terkirim (termasuk rate limit)",
+    "notification_queue_size": "Notifikasi yang masih di antrian",
+    "event_loop_lag_seconds": "Keterlambatan heartbeat event loop (watchdog)",
+    "event_loop_stalls_total": "Event loop macet melewati LOOP_WATCHDOG_THRESHOLD",
+    "process_uptime_seconds": "Umur proses bot",
+}
+
+class Histogram:
+    """Histogram dengan bucket tetap (seperti Prometheus), counts per bucket tidak kumulatif"""
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # bucket terakhir = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Perkiraan kuantil dari bucket (interpolasi linear di dalam bucket)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if count and seen + count >= rank:
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+            lower = upper
+        return self.max
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=None):
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    """
+    Registry metric di memori: counter, histogram dan gauge (callback yang dibaca saat render).
+    Semua diakses dari event loop bot (dan thread DB yang sama), jadi tanpa lock.
+    """
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}    # name -> {label key: value}
+        self.histograms = {}  # name -> {label key: Histogram}
+        self.gauges = {}      # name -> callback() -> angka atau iterable (labels dict, angka)
+
+    def inc(self, name, amount=1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS, **labels):
+        """Histogram untuk (name, labels), dibuat jika belum ada; simpan untuk dipakai di hot path"""
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        return histogram
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        self.histogram(name, buckets, **labels).observe(value)
+
+    def gauge(self, name, callback):
+        self.gauges[name] = callback
+
+    def timed(self, name, buckets=LATENCY_BUCKETS, **labels):
+        """Decorator coroutine function: durasi tiap panggilan dicatat ke histogram name"""
+        histogram = self.histogram(name, buckets, **labels)
+
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def counter_total(self, name, **labels):
+        """Jumlah counter name untuk semua series yang cocok dengan labels"""
+        wanted = labels.items()
+        return sum(
+            value for key, value in self.counters.get(name, {}).items()
+            if wanted <= dict(key).items()
+        )
+
+    def series(self, name):
+        """[(labels dict, Histogram)] untuk histogram name"""
+        return [(dict(key), histogram) for key, histogram in self.histograms.get(name, {}).items()]
+
+    def render(self):
+        """Format teks Prometheus (text/plain; version=0.0.4)"""
+        lines = []
+
+        def header(name, kind):
+            if name in METRIC_HELP:
+                lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        self.gauges.setdefault("process_uptime_seconds", lambda: time.time() - self.started)
+        for name, callback in sorted(self.gauges.items()):
+            try:
+                value = callback()
+            except Exception as e:
+                logging.error(f"❌ Gagal membaca gauge {name}: {e}")
+                continue
+            header(name, "gauge")
+            if isinstance(value, (int, float)):
+                lines.append(f"{name} {_format_value(value)}")
+            else:
+                for labels, item in value:
+                    lines.append(f"{name}{_format_labels(_label_key(labels))} {_format_value(item)}")
+
+        for name, series in sorted(self.counters.items()):
+            header(name, "counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        for name, series in sorted(self.histograms.items()):
+            header(name, "histogram")
+            for key, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, float('inf')), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """
+    Endpoint HTTP minimal untuk Prometheus (GET /metrics), berjalan di event loop bot.
+    Default hanya listen di localhost; aktif jika METRICS_PORT diset.
+    """
+    def __init__(self, registry=None, host=None, port=None):
+        self.registry = registry or metrics
+        self.host = host or getattr(config, 'METRICS_HOST', '127.0.0.1')
+        self.port = port if port is not None else getattr(config, 'METRICS_PORT', None)
+        self._server = None
+
+    async def start(self):
+        if not self.port:
+            return False
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        return True
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            # Sisa header tidak dipakai, cukup dibaca sampai baris kosong
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+            parts = request.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] in ('/metrics', '/'):
+                status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+                body = self.registry.render().encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+# Registry bersama untuk RouterAPI, Database, scheduler, notifier dan /stats
+metrics = Metrics()
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+import config
+from core.metrics import metrics
+from utils.formatter import split_lines
+
+# Judul pesan digest per event_type
+DIGEST_TITLES = {
+    "hotspot_login": "🔓 **Hotspot Login**",
+    "hotspot_logout": "🔐 **Hotspot Logout**",
+    "dhcp_new": "🆕 **DHCP NEW**",
+    "dhcp_renew": "🔄 **DHCP RENEW**",
+    "dhcp_release": "❌ **DHCP RELEASE**",
+    "interface_down": "🔴 **LINK DOWN**",
+    "interface_up": "🟢 **LINK UP**",
+}
+
+class TokenBucket:
+    """Rate limiter token bucket: rate token per detik, maksimal capacity token (burst)"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Tahan semua acquire selama seconds detik (mis. saat Telegram membalas RetryAfter)"""
+        loop = asyncio.get_running_loop()
+        self.paused_until = max(self.paused_until, loop.time() + seconds)
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                if self.updated is not None:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class NotificationDispatcher:
+    """
+    Dispatcher notifikasi Telegram.
+    Job cukup memanggil notify()/enqueue() lalu selesai; pengiriman dilakukan worker per chat
+    (urutan pesan per chat terjaga) dengan rate limit per chat dan global.
+    """
+    def __init__(self, global_rate=None, chat_rate=None, chat_burst=None, max_retries=None):
+        global_rate = global_rate or getattr(config, 'NOTIFY_GLOBAL_RATE', 25)
+        self.global_limiter = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate or getattr(config, 'NOTIFY_CHAT_RATE', 1)
+        self.chat_burst = chat_burst or getattr(config, 'NOTIFY_CHAT_BURST', 3)
+        self.max_retries = max_retries if max_retries is not None else getattr(config, 'NOTIFY_MAX_RETRIES', 3)
+        # Digest: event dalam window yang sama digabung per tipe jadi satu pesan.
+        # Tipe di immediate_types (mis. interface_down) selalu dikirim langsung.
+        self.digest_window = getattr(config, 'NOTIFY_DIGEST_WINDOW', 0)
+        self.immediate_types = set(getattr(config, 'NOTIFY_IMMEDIATE_TYPES', ['interface_down', 'interface_up']))
+        self.digest_buffer = {}
+        self._digest_task = None
+        self.bot = None
+        self.queues = {}
+        self.workers = {}
+        self.chat_limiters = {}
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.digested = 0
+        metrics.gauge("notification_queue_size", self.pending)
+
+    def start(self, bot):
+        """Mulai worker (dipanggil dari post_init, di dalam event loop bot)"""
+        self.bot = bot
+        for chat_id in self.queues:
+            self._ensure_worker(chat_id)
+
+    async def stop(self, timeout=5):
+        """Tunggu antrian terkirim (maks timeout detik), lalu hentikan semua worker"""
+        if self._digest_task is not None:
+            self._digest_task.cancel()
+            self._digest_task = None
+        self.flush_digest()
+        pending = [queue.join() for queue in self.queues.values()]
+        if pending:
+            try:
+                await asyncio.wait_for(asyncio.gather(*pending), timeout)
+            except asyncio.TimeoutError:
+                logging.warning("⚠️ Sebagian notifikasi belum terkirim saat shutdown")
+        for worker in self.workers.values():
+            worker.cancel()
+        await asyncio.gather(*self.workers.values(), return_exceptions=True)
+        self.workers.clear()
+
+    def pending(self):
+        """Jumlah pesan yang masih di antrian"""
+        return sum(queue.qsize() for queue in self.queues.values())
+
+    def enqueue(self, chat_id, text, event_type=None, parse_mode='Markdown'):
+        queue = self.queues.get(chat_id)
+        if queue is None:
+            queue = self.queues[chat_id] = asyncio.Queue()
+            self.chat_limiters[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        queue.put_nowait((text, event_type, parse_mode, time.monotonic()))
+        if self.bot is not None:
+            self._ensure_worker(chat_id)
+
+    def notify(self, events):
+        """Antrikan list (message, event_type, summary) ke semua ALLOWED_USERS"""
+        if not config.SEND_TO_ALLOWED_USERS:
+            return
+        for message, event_type, summary in events:
+            if self.digest_window and event_type not in self.immediate_types:
+                self.digest_buffer.setdefault(event_type, []).append((message, summary))
+                continue
+            self._broadcast(message, event_type)
+
+        if self.digest_buffer and self._digest_task is None:
+            self._digest_task = asyncio.create_task(self._flush_digest_later())
+
+    def _broadcast(self, message, event_type):
+        for user_id in config.ALLOWED_USERS:
+            self.enqueue(user_id, message, event_type)
+
+    async def _flush_digest_later(self):
+        await asyncio.sleep(self.digest_window)
+        self._digest_task = None
+        self.flush_digest()
+
+    def flush_digest(self):
+        """Kirim semua event di buffer digest: satu pesan (atau beberapa jika > 4096 karakter) per tipe"""
+        buffer, self.digest_buffer = self.digest_buffer, {}
+        for event_type, items in buffer.items():
+            if len(items) == 1:
+                # Satu event saja: kirim pesan lengkapnya
+                self._broadcast(items[0][0], event_type)
+                continue
+            title = DIGEST_TITLES.get(event_type, f"**{event_type}**")
+            header = f"{title} ({len(items)} event)\n━━━━━━━━━━━━━━━━━━\n"
+            for chunk in split_lines(header, [summary for _, summary in items]):
+                self._broadcast(chunk, event_type)
+            self.digested += len(items)
+
+    def _ensure_worker(self, chat_id):
+        worker = self.workers.get(chat_id)
+        if worker is None or worker.done():
+            self.workers[chat_id] = asyncio.create_task(self._worker(chat_id), name=f"notify-{chat_id}")
+
+    async def _worker(self, chat_id):
+        queue = self.queues[chat_id]
+        limiter = self.chat_limiters[chat_id]
+        while True:
+            text, event_type, parse_mode, enqueued_at = await queue.get()
+            try:
+                await self._send(chat_id, limiter, text, event_type, parse_mode, enqueued_at)
+            finally:
+                queue.task_done()
+
+    async def _send(self, chat_id, limiter, text, event_type, parse_mode, enqueued_at=None):
+        attempt = 0
+        label = event_type or "other"
+        while True:
+            await limiter.acquire()
+            await self.global_limiter.acquire()
+            try:
+                started = time.monotonic()
+                await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                self.sent += 1
+                metrics.inc("notifications_total", result="sent")
+                metrics.observe("notification_send_duration_seconds", time.monotonic() - started, event_type=label)
+                if enqueued_at is not None:
+                    metrics.observe("notification_delivery_seconds", time.monotonic() - enqueued_at, event_type=label)
+                logging.info(f"✅ Notification sent to {chat_id}: {event_type}")
+                return
+            except RetryAfter as e:
+                # Flood control: tahan semua pengiriman, lalu ulangi pesan yang sama
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                logging.warning(f"⚠️ Telegram flood limit, retry dalam {delay}s")
+                self.global_limiter.pause(delay)
+                self.retried += 1
+                metrics.inc("notifications_total", result="retried")
+            except (BadRequest, Forbidden) as e:
+                # Tidak akan berhasil walau diulang (chat tidak valid, bot diblokir, format salah)
+                self.failed += 1
+                metrics.inc("notifications_total", result="failed")
+                logging.error(f"❌ Failed to send notification to {chat_id}: {e}")
+                return
+            except TelegramError as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self.failed += 1
+                    metrics.inc("notifications_total", result="failed")
+                    logging.error(f"❌ Failed to send notification to {chat_id}: {e}")
+                    return
+                self.retried += 1
+                metrics.inc("notifications_total", result="retried")
+                await asyncio.sleep(min(30, 2 ** attempt))
+            except Exception as e:
+                self.failed += 1
+                metrics.inc("notifications_total", result="failed")
+                logging.error(f"❌ Failed to send notification to {chat_id}: {e}")
+                return
+
+# Dispatcher bersama untuk semua job notifikasi
+notifier = NotificationDispatcher()
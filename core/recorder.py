@@ -0,0 +1,107 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config
+from core.router_api import RouterAPI
+
+# Path yang direkam default: yang dipakai detector event
+DEFAULT_RECORD_PATHS = ("interface", "ip/hotspot/active", "ip/dhcp-server/lease")
+
+class ResponseRecorder:
+    """
+    Rekam response GET RouterAPI ke file JSON lines terkompresi gzip, satu baris per response:
+    {"t": epoch, "path": ..., "fields": [...] / null, "filters": {...} / null, "data": ...}
+
+    filename boleh berisi format strftime (mis. "records/router-%Y%m%d.jsonl.gz"), file baru
+    dibuka saat nama berubah. File dibuka dalam mode append (tiap sesi jadi member gzip baru).
+    Serialisasi dan kompresi dijalankan di satu thread worker supaya tidak memblokir event loop
+    dan urutan baris tetap sama dengan urutan response.
+    """
+    def __init__(self, filename=None, paths=None, compresslevel=6):
+        self.filename = filename or getattr(config, 'ROUTER_RECORD_FILE', None)
+        self.paths = set(paths or getattr(config, 'ROUTER_RECORD_PATHS', DEFAULT_RECORD_PATHS))
+        self.compresslevel = compresslevel
+        self.records = 0
+        self._current = None
+        self._file = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder")
+
+    def record(self, path, fields, filters, data, t=None):
+        """Antrikan satu response untuk ditulis. data tidak boleh dimodifikasi setelahnya (dipakai bersama cache)"""
+        if path not in self.paths or self._executor is None:
+            return
+        self.records += 1
+        self._executor.submit(self._write, time.time() if t is None else t, path, fields, filters, data)
+
+    def _write(self, t, path, fields, filters, data):
+        try:
+            filename = time.strftime(self.filename, time.localtime(t))
+            if filename != self._current:
+                self._close_file()
+                directory = os.path.dirname(filename)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = gzip.open(filename, 'at', encoding='utf-8', compresslevel=self.compresslevel)
+                self._current = filename
+            line = json.dumps(
+                {"t": round(t, 3), "path": path, "fields": list(fields) if fields else None,
+                 "filters": filters or None, "data": data},
+                separators=(',', ':')
+            )
+            self._file.write(line + '\n')
+        except Exception as e:
+            logging.error(f"❌ Gagal merekam response {path}: {e}")
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._current = None
+
+    def close(self):
+        """Tunggu semua response tertulis lalu tutup file"""
+        if self._executor is None:
+            return
+        self._executor.submit(self._close_file)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+def read_records(*patterns):
+    """
+    Baca rekaman (urut waktu) dari satu atau beberapa file / pola glob.
+    Yield dict per response seperti yang ditulis ResponseRecorder.
+    """
+    filenames = sorted({name for pattern in patterns for name in (glob.glob(pattern) or [pattern])})
+    for filename in filenames:
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+class ReplayAPI(RouterAPI):
+    """
+    RouterAPI yang menjawab GET dari rekaman, bukan dari router.
+    load(record) memasang response terbaru untuk path record; fetch berikutnya ke path
+    tersebut mengembalikan data itu. Cache dimatikan supaya tiap tick replay memakai
+    response yang baru dipasang. POST tidak didukung (return None).
+    """
+    def __init__(self):
+        super().__init__(router_url="http://replay.invalid")
+        self.cache_ttl = {}
+        self.responses = {}
+        self.now = None
+
+    def load(self, record):
+        self.responses[record['path']] = record['data']
+        self.now = record['t']
+
+    async def _fetch_resource(self, path, fields=None, filters=None):
+        return self.responses.get(path)
+
+    async def post_resource(self, path, data=None):
+        return None
@@ -1,167 +1,529 @@
-import requests
-from requests.auth import HTTPBasicAuth
+import asyncio
+import hashlib
+import httpx
 import config
-import urllib3
 import logging
 import os
+import random
 import tempfile
+import time
+from core.circuit_breaker import CircuitBreaker
+from core.metrics import metrics
 
-# Menghilangkan pesan warning InsecureRequest di log
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Counter error/drop yang dipakai untuk monitoring interface
+ERROR_COUNTER_KEYS = ('rx-error', 'tx-error', 'rx-drop', 'tx-drop')
+
+# TTL cache default per path (detik), bisa di-override dengan ROUTER_CACHE_TTL
+DEFAULT_CACHE_TTL = {
+    "interface": 5,
+    "ip/dhcp-server/lease": 10,
+    "ip/hotspot/active": 10,
+}
+
+# Tipe interface yang punya statistik tambahan di interface/ethernet
+STATS_INTERFACE_TYPES = {'ether'}
+
+# Ukuran chunk saat streaming download file dari router
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Batas jeda backoff retry GET (detik)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 4
+
+# Nilai gauge router_circuit_state
+CIRCUIT_STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+class BackupTooLarge(Exception):
+    """File backup melebihi batas ukuran (dari Content-Length atau byte yang sudah diterima)"""
+    def __init__(self, size, limit):
+        super().__init__(f"backup size {size} exceeds limit {limit}")
+        self.size = size
+        self.limit = limit
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _covers(cached_key, requested_key):
+    """True jika hasil cache (fields, filters) bisa menjawab request (fields, filters)"""
+    cached_fields, cached_filters = cached_key
+    requested_fields, requested_filters = requested_key
+    if cached_filters != requested_filters:
+        return False
+    if cached_fields is None:
+        return True
+    return requested_fields is not None and requested_fields <= cached_fields
+
+def _merge_error_counters(iface, stats):
+    """Salin counter error/drop dari hasil stats ke dict interface"""
+    if not isinstance(stats, dict):
+        return
+    for key in ERROR_COUNTER_KEYS:
+        if key in stats:
+            iface[key] = stats[key]
 
 class RouterAPI:
-    def __init__(self):
-        self.base_url = f"https://{config.ROUTER_IP}/rest"
-        self.auth = HTTPBasicAuth(config.ROUTER_USER, config.ROUTER_PASS)
-        self.verify = False 
+    def __init__(self, router_url=None, username=None, password=None, verify=False,
+                 timeout=10, max_connections=10, connect_timeout=None, retries=None):
+        # router_url bisa di-override (mis. untuk benchmark ke fake server lokal)
+        self.router_url = (router_url or f"https://{config.ROUTER_IP}").rstrip('/')
+        self.base_url = f"{self.router_url}/rest"
+        self.auth = httpx.BasicAuth(username or config.ROUTER_USER, password or config.ROUTER_PASS)
+        self.verify = verify
+        # Connect timeout lebih pendek: router mati langsung ketahuan tanpa menunggu timeout penuh
+        connect_timeout = connect_timeout or getattr(config, 'ROUTER_CONNECT_TIMEOUT', 3)
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, connect_timeout))
+        # Koneksi TLS di-keep-alive dan di-pool supaya tidak handshake ulang tiap request
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60
+        )
+        self._client = None
+        # Jumlah request REST pada panggilan get_interfaces_detail terakhir
+        self.last_detail_requests = 0
+
+        # Cache hasil GET per path: path -> {(fields, filters): (waktu fetch, data)}
+        # TTL per path (detik) dari config, path yang tidak ada = tidak di-cache
+        self.cache_ttl = dict(getattr(config, 'ROUTER_CACHE_TTL', DEFAULT_CACHE_TTL))
+        self.cache = {}
+        # Request yang sedang berjalan: path -> {(fields, filters): Task}
+        self.inflight = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        # ResponseRecorder (core/recorder.py) opsional: rekam response GET untuk replay
+        self.recorder = None
+
+        # Circuit breaker per endpoint (path) dan jumlah retry GET (idempotent) saat gagal
+        self.breakers = {}
+        self.retries = retries if retries is not None else getattr(config, 'ROUTER_GET_RETRIES', 2)
+
+    @property
+    def client(self):
+        """AsyncClient persisten, dibuat saat pertama kali dipakai"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                auth=self.auth,
+                verify=self.verify,
+                timeout=self.timeout,
+                limits=self.limits
+            )
+        return self._client
+
+    async def aclose(self):
+        """Tutup semua koneksi di pool (dipanggil saat bot shutdown)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def get_resource(self, path, fields=None, filters=None, max_age=None):
+        """
+        GET resource dari REST API, lewat cache dan single-flight.
+        fields: list property yang diminta (.proplist), None = semua property.
+        filters: dict filter server-side, mis. {"type": "ether"}.
+        max_age: umur maksimal hasil cache yang boleh dipakai (detik),
+                 None = TTL path dari ROUTER_CACHE_TTL, 0 = selalu request baru.
+        Hasil bisa dibagi ke beberapa caller, jangan dimodifikasi langsung.
+        """
+        path = path.lstrip('/')
+        key = (frozenset(fields) if fields else None, tuple(sorted((filters or {}).items())))
+        if max_age is None:
+            max_age = self.cache_ttl.get(path, 0)
+
+        # Hasil cache yang cukup baru (field-nya mencakup field yang diminta)
+        if max_age > 0:
+            now = time.monotonic()
+            for cached_key, (fetched_at, data) in self.cache.get(path, {}).items():
+                if now - fetched_at <= max_age and _covers(cached_key, key):
+                    self.cache_hits += 1
+                    metrics.inc("router_cache_total", path=path, result="hit")
+                    return data
 
-    def get_resource(self, path):
+        # Single-flight: ikut menunggu request yang sama yang sedang berjalan
+        for running_key, task in self.inflight.get(path, {}).items():
+            if _covers(running_key, key):
+                self.coalesced += 1
+                metrics.inc("router_cache_total", path=path, result="coalesced")
+                return await asyncio.shield(task)
+
+        self.cache_misses += 1
+        metrics.inc("router_cache_total", path=path, result="miss")
+        task = asyncio.ensure_future(self._fetch_resource(path, fields, filters))
+        self.inflight.setdefault(path, {})[key] = task
+        task.add_done_callback(lambda t: self._on_fetched(path, key, t))
+        return await asyncio.shield(task)
+
+    def _on_fetched(self, path, key, task):
+        """Lepas request dari daftar in-flight dan simpan hasil sukses ke cache"""
+        running = self.inflight.get(path, {})
+        if running.get(key) is task:
+            del running[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        data = task.result()
+        if data is not None and path in self.cache_ttl:
+            self.cache.setdefault(path, {})[key] = (time.monotonic(), data)
+
+    def breaker(self, path):
+        """Circuit breaker untuk satu endpoint, dibuat saat pertama kali dipakai"""
+        path = path.lstrip('/')
+        breaker = self.breakers.get(path)
+        if breaker is None:
+            breaker = self.breakers[path] = CircuitBreaker(path)
+        return breaker
+
+    def is_unreachable(self, path):
+        """True jika circuit endpoint sedang open/half-open (router dianggap tidak bisa dihubungi)"""
+        breaker = self.breakers.get(path.lstrip('/'))
+        return breaker is not None and breaker.state != CircuitBreaker.CLOSED
+
+    def retry_after(self, path):
+        """Detik sampai endpoint dicoba lagi (0 jika circuit tidak open)"""
+        breaker = self.breakers.get(path.lstrip('/'))
+        return breaker.retry_after() if breaker is not None else 0.0
+
+    def last_known(self, path, fields=None, filters=None):
+        """
+        Hasil cache terakhir yang mencakup (fields, filters), berapa pun umurnya.
+        Return (umur detik, data) atau None. Dipakai saat router tidak bisa dihubungi.
+        """
+        path = path.lstrip('/')
+        key = (frozenset(fields) if fields else None, tuple(sorted((filters or {}).items())))
+        best = None
+        for cached_key, (fetched_at, data) in self.cache.get(path, {}).items():
+            if _covers(cached_key, key) and (best is None or fetched_at > best[0]):
+                best = (fetched_at, data)
+        if best is None:
+            return None
+        return time.monotonic() - best[0], best[1]
+
+    def invalidate(self, path=None):
+        """Hapus cache satu path (atau semua)"""
+        if path is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(path.lstrip('/'), None)
+
+    @staticmethod
+    def _record_request(method, path, status, started, size=0):
+        """Catat satu request REST ke metrics (count, durasi, byte)"""
+        metrics.inc("router_requests_total", method=method, path=path, status=status)
+        metrics.observe("router_request_duration_seconds", time.perf_counter() - started, method=method, path=path)
+        if size:
+            metrics.inc("router_response_bytes_total", size, method=method, path=path)
+
+    async def _fetch_resource(self, path, fields=None, filters=None):
+        """
+        GET langsung ke router tanpa cache, lewat circuit breaker endpoint.
+        Saat circuit open langsung return None (fail fast). Router tidak bisa dihubungi /
+        timeout / HTTP 5xx diulang sampai self.retries kali dengan backoff ber-jitter.
+        """
+        breaker = self.breaker(path)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._record_request("GET", path, "circuit_open", time.perf_counter())
+                logging.debug(f"Circuit {path} open, request dilewati ({breaker.retry_after():.0f}s lagi)")
+                return None
+            data, failed = await self._get_once(path, fields, filters)
+            if not failed:
+                breaker.success()
+                return data
+            breaker.failure()
+            if attempt >= self.retries or breaker.state != CircuitBreaker.CLOSED:
+                return None
+            attempt += 1
+            metrics.inc("router_retries_total", path=path)
+            # Full jitter: caller yang gagal bersamaan tidak mengulang serentak
+            await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt)))
+
+    async def _get_once(self, path, fields=None, filters=None):
+        """
+        Satu GET ke router. Return (data, failed): failed True jika router tidak bisa
+        dihubungi atau error di sisi router (5xx), yang dihitung circuit breaker dan boleh diulang.
+        """
+        started = time.perf_counter()
+        status = "error"
+        size = 0
         try:
             # Pastikan path tidak diawali / karena base_url sudah punya /rest
-            url = f"{self.base_url}/{path.lstrip('/')}"
-            response = requests.get(url, auth=self.auth, verify=self.verify, timeout=10)
-            
+            url = f"{self.base_url}/{path}"
+            params = dict(filters or {})
+            if fields:
+                params['.proplist'] = ','.join(fields)
+            response = await self.client.get(url, params=params or None)
+            status = str(response.status_code)
+            size = len(response.content)
+
             # Cek jika status code bukan 200 OK
             if response.status_code != 200:
                 print(f"❌ Error API: Status {response.status_code} - {response.text}")
-                return None
-            
+                return None, response.status_code >= 500
+
             # Pastikan response adalah JSON
-            return response.json()
-            
-        except requests.exceptions.JSONDecodeError:
+            data = response.json()
+            if self.recorder is not None:
+                self.recorder.record(path, fields, filters, data)
+            return data, False
+
+        except ValueError:
             print(f"❌ Error: Respon dari MikroTik bukan JSON. Raw content: {response.text[:100]}")
-            return None
+            return None, False
         except Exception as e:
             print(f"❌ Connection Error: {e}")
-            return None
+            return None, True
+        finally:
+            self._record_request("GET", path, status, started, size)
 
-    def post_resource(self, path, data=None):
-        """POST request ke router"""
+    async def post_resource(self, path, data=None):
+        """POST request ke router (tidak di-retry karena belum tentu idempotent)"""
+        path = path.lstrip('/')
+        breaker = self.breaker(path)
+        if not breaker.allow():
+            self._record_request("POST", path, "circuit_open", time.perf_counter())
+            return None
+        started = time.perf_counter()
+        status = "error"
+        size = 0
         try:
-            url = f"{self.base_url}/{path.lstrip('/')}"
-            response = requests.post(url, auth=self.auth, verify=self.verify, timeout=10, json=data)
-            
+            url = f"{self.base_url}/{path}"
+            response = await self.client.post(url, json=data)
+            status = str(response.status_code)
+            size = len(response.content)
+
             if response.status_code not in [200, 201]:
                 print(f"❌ Error API POST: Status {response.status_code} - {response.text}")
+                if response.status_code >= 500:
+                    breaker.failure()
+                else:
+                    breaker.success()
                 return None
-            
+
+            breaker.success()
             return response.json() if response.text else {"status": "ok"}
-            
+
         except Exception as e:
             print(f"❌ Connection Error (POST): {e}")
+            breaker.failure()
             return None
+        finally:
+            self._record_request("POST", path, status, started, size)
 
-    def get_interfaces(self):
-        return self.get_resource("interface")
+    async def get_interfaces(self, fields=None, filters=None, max_age=None):
+        return await self.get_resource("interface", fields, filters, max_age)
 
-    def get_hotspot_users(self):
+    async def get_hotspot_users(self):
         """Ambil daftar user hotspot yang sedang aktif"""
-        return self.get_resource("ip/hotspot/user")
+        return await self.get_resource("ip/hotspot/user")
 
-    def get_hotspot_sessions(self):
+    async def get_hotspot_sessions(self, fields=None, filters=None, max_age=None):
         """Ambil daftar session hotspot yang aktif (login info)"""
-        return self.get_resource("ip/hotspot/active")
+        return await self.get_resource("ip/hotspot/active", fields, filters, max_age)
 
-    def get_dhcp_leases(self):
+    async def get_dhcp_leases(self, fields=None, filters=None, max_age=None):
         """Ambil daftar DHCP lease dari server"""
-        return self.get_resource("ip/dhcp-server/lease")
+        return await self.get_resource("ip/dhcp-server/lease", fields, filters, max_age)
 
-    def get_ppp_secrets(self):
+    async def get_ppp_secrets(self):
         """Ambil daftar PPP secrets (user/password)"""
-        return self.get_resource("ppp/secret")
+        return await self.get_resource("ppp/secret")
 
-    def backup_router(self):
-        """Trigger backup router configuration"""
+    async def backup_router(self, name=None):
+        """Trigger backup router configuration (name tanpa .backup, None = nama default router)"""
         try:
             # Trigger backup save tanpa password
-            data = {}
-            result = self.post_resource("system/backup/save", data)
+            data = {"name": name} if name else {}
+            result = await self.post_resource("system/backup/save", data)
             return result
         except Exception as e:
             print(f"❌ Error triggering backup: {e}")
             return None
 
-    def download_backup(self, filename="backup.backup"):
-        """Download backup file dari router"""
+    async def download_backup(self, filename="backup.backup", max_size=None, progress=None):
+        """
+        Download backup file dari router secara streaming (per chunk, tidak ditampung di RAM).
+        max_size: batas ukuran (byte), dicek dari Content-Length dan dari byte yang diterima;
+                  jika terlewati raise BackupTooLarge.
+        progress: coroutine function progress(received, total) yang dipanggil tiap chunk
+                  (total None jika router tidak mengirim Content-Length).
+        Return dict(path, size, sha256), None jika gagal.
+        """
+        breaker = self.breaker("download")
+        if not breaker.allow():
+            self._record_request("GET", "download", "circuit_open", time.perf_counter())
+            return None
+        temp_file = None
+        started = time.perf_counter()
+        status = "error"
+        received = 0
         try:
             # URL untuk download backup
-            url = f"https://{config.ROUTER_IP}/download?file={filename}"
-            response = requests.get(url, auth=self.auth, verify=self.verify, timeout=30)
-            
-            if response.status_code != 200:
-                print(f"❌ Error downloading backup: Status {response.status_code}")
-                return None
-            
-            # Simpan file ke temp location
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".backup")
-            temp_file.write(response.content)
+            url = f"{self.router_url}/download"
+            async with self.client.stream("GET", url, params={"file": filename}, timeout=30) as response:
+                status = str(response.status_code)
+                if response.status_code != 200:
+                    print(f"❌ Error downloading backup: Status {response.status_code}")
+                    if response.status_code >= 500:
+                        breaker.failure()
+                    else:
+                        breaker.success()
+                    return None
+
+                total = response.headers.get("Content-Length")
+                total = int(total) if total and total.isdigit() else None
+                if max_size and total is not None and total > max_size:
+                    raise BackupTooLarge(total, max_size)
+
+                # Simpan file ke temp location sambil menghitung hash
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".backup")
+                digest = hashlib.sha256()
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    received += len(chunk)
+                    if max_size and received > max_size:
+                        raise BackupTooLarge(received, max_size)
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    if progress is not None:
+                        await progress(received, total)
+
             temp_file.close()
-            
-            return temp_file.name
-            
+            breaker.success()
+            return {"path": temp_file.name, "size": received, "sha256": digest.hexdigest()}
+
+        except BackupTooLarge:
+            breaker.success()
+            self._discard(temp_file)
+            raise
         except Exception as e:
             print(f"❌ Error downloading backup file: {e}")
+            breaker.failure()
+            self._discard(temp_file)
             return None
+        finally:
+            self._record_request("GET", "download", status, started, received)
+
+    @staticmethod
+    def _discard(temp_file):
+        """Tutup dan hapus file download yang tidak selesai"""
+        if temp_file is None:
+            return
+        temp_file.close()
+        try:
+            os.remove(temp_file.name)
+        except OSError:
+            pass
 
-    def get_backup_files(self):
+    async def get_backup_files(self, fields=None, filters=None):
         """List semua backup files di router"""
-        return self.get_resource("file")
+        return await self.get_resource("file", fields, filters, max_age=0)
 
-    def get_system_identity(self):
+    async def get_system_identity(self):
         """Ambil identitas system router"""
-        result = self.get_resource("system/identity")
+        result = await self.get_resource("system/identity")
         if isinstance(result, list) and len(result) > 0:
             return result[0]
         return result
 
-    def get_interfaces_detail(self):
+    async def get_interfaces_detail(self, fields=None, max_age=None):
         """Ambil detail semua interface dengan status, speed, dan error info"""
         try:
-            interfaces = self.get_interfaces()
+            if fields:
+                # name dan type selalu dibutuhkan untuk enrichment stats
+                fields = list(dict.fromkeys(['name', 'type', *fields, *ERROR_COUNTER_KEYS]))
+
+            requests_made = 1
+            interfaces = await self.get_interfaces(fields, max_age=max_age)
             if not interfaces:
                 return None
-            
-            # Enrichment data dengan statistik error
+            # Hasil bisa berasal dari cache bersama, enrichment dilakukan pada salinan
+            interfaces = [dict(iface) for iface in interfaces]
+
+            # /interface sudah membawa counter error/drop untuk semua interface,
+            # stats tambahan hanya diminta untuk tipe yang memang punya (ethernet)
+            missing = [
+                iface for iface in interfaces
+                if iface.get('type') in STATS_INTERFACE_TYPES
+                and any(key not in iface for key in ERROR_COUNTER_KEYS)
+            ]
+
+            if missing:
+                # Satu request bulk untuk stats semua ethernet
+                requests_made += 1
+                bulk = await self.post_resource(
+                    "interface/ethernet/print",
+                    {"stats": "", ".proplist": ['name', *ERROR_COUNTER_KEYS]}
+                )
+                if isinstance(bulk, list):
+                    stats_by_name = {row.get('name'): row for row in bulk}
+                    for iface in missing:
+                        _merge_error_counters(iface, stats_by_name.get(iface.get('name')))
+                    # Yang tidak ada di hasil bulk saja yang perlu di-lookup satu per satu
+                    missing = [iface for iface in missing if iface.get('name') not in stats_by_name]
+
+            if missing:
+                # Fallback per-interface, paralel dengan batas concurrency
+                limit = asyncio.Semaphore(getattr(config, 'INTERFACE_STATS_CONCURRENCY', 4))
+
+                async def fetch_stats(iface):
+                    async with limit:
+                        stats = await self.get_resource(
+                            f"interface/ethernet/{iface.get('name')}",
+                            ['name', *ERROR_COUNTER_KEYS]
+                        )
+                    if isinstance(stats, list) and stats:
+                        stats = stats[0]
+                    _merge_error_counters(iface, stats)
+
+                requests_made += len(missing)
+                await asyncio.gather(*(fetch_stats(iface) for iface in missing))
+
             for iface in interfaces:
-                iface_name = iface.get('name')
-                # Coba ambil statistics jika tersedia
-                stats = self.get_resource(f"interface/ether/{iface_name}/stats")
-                if stats and isinstance(stats, dict):
-                    iface['rx-error'] = stats.get('rx-error', 0)
-                    iface['tx-error'] = stats.get('tx-error', 0)
-                    iface['rx-drop'] = stats.get('rx-drop', 0)
-                    iface['tx-drop'] = stats.get('tx-drop', 0)
-            
+                for key in ERROR_COUNTER_KEYS:
+                    iface[key] = _to_int(iface.get(key, 0))
+
+            self.last_detail_requests = requests_made
+            logging.debug(f"get_interfaces_detail: {len(interfaces)} interface, {requests_made} request")
             return interfaces
         except Exception as e:
             print(f"❌ Error getting interface details: {e}")
             return None
 
-    def get_ppp_interfaces(self):
+    async def get_ppp_interfaces(self):
         """Ambil PPP interface (untuk monitoring dial-up/DSL links)"""
-        return self.get_resource("interface/ppp")
+        return await self.get_resource("interface/ppp")
 
-    def get_ether_interfaces(self):
+    async def get_ether_interfaces(self):
         """Ambil ethernet interface"""
-        return self.get_resource("interface/ether")
+        return await self.get_resource("interface/ether")
 
-    def get_wireless_interfaces(self):
+    async def get_wireless_interfaces(self):
         """Ambil wireless interface"""
-        return self.get_resource("interface/wireless")
+        return await self.get_resource("interface/wireless")
 
-    def get_bridge_interfaces(self):
+    async def get_bridge_interfaces(self):
         """Ambil bridge interface"""
-        return self.get_resource("interface/bridge")
+        return await self.get_resource("interface/bridge")
 
-    def get_link_status(self, interface_name):
+    async def get_link_status(self, interface_name):
         """Ambil status link dari interface tertentu"""
         try:
             # Coba ambil dari interface path
-            result = self.get_resource(f"interface/{interface_name}")
+            result = await self.get_resource(f"interface/{interface_name}")
             if result and isinstance(result, list) and len(result) > 0:
                 return result[0]
             return None
         except Exception as e:
             print(f"❌ Error getting link status: {e}")
-            return None
\ No newline at end of file
+            return None
+
+# Client bersama untuk job, detector dan command handler (satu pool koneksi + satu cache)
+api = RouterAPI()
+
+# State circuit breaker di /metrics hanya dari client bersama (instance lain, mis. ReplayAPI
+# atau client benchmark, tidak menimpanya)
+metrics.gauge("router_circuit_state", lambda: [
+    ({"path": path}, CIRCUIT_STATE_VALUES[breaker.state]) for path, breaker in api.breakers.items()
+])
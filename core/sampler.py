@@ -0,0 +1,162 @@
+import math
+import time
+from array import array
+import config
+
+NAN = float('nan')
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+class RingBuffer:
+    """
+    Buffer melingkar ukuran tetap untuk sample counter satu interface.
+    Data disimpan di array (bukan list of dict) supaya memori per sample tetap kecil.
+    """
+    __slots__ = ('capacity', 'count', 'head', 'timestamps', 'rx_bytes', 'tx_bytes', 'rx_bps', 'tx_bps')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        self.head = 0  # Index slot untuk sample berikutnya
+        self.timestamps = array('d', [0.0]) * capacity
+        self.rx_bytes = array('Q', [0]) * capacity
+        self.tx_bytes = array('Q', [0]) * capacity
+        self.rx_bps = array('d', [NAN]) * capacity
+        self.tx_bps = array('d', [NAN]) * capacity
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, rx, tx, rx_bps, tx_bps):
+        i = self.head
+        self.timestamps[i] = timestamp
+        self.rx_bytes[i] = rx
+        self.tx_bytes[i] = tx
+        self.rx_bps[i] = rx_bps
+        self.tx_bps[i] = tx_bps
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self):
+        """Sample terbaru: (timestamp, rx, tx, rx_bps, tx_bps) atau None"""
+        if self.count == 0:
+            return None
+        i = (self.head - 1) % self.capacity
+        return (self.timestamps[i], self.rx_bytes[i], self.tx_bytes[i], self.rx_bps[i], self.tx_bps[i])
+
+    def recent_indexes(self, since):
+        """Index sample dengan timestamp >= since, dari yang terbaru"""
+        for n in range(1, self.count + 1):
+            i = (self.head - n) % self.capacity
+            if self.timestamps[i] < since:
+                break
+            yield i
+
+class TrafficSampler:
+    """
+    Sampler trafik frekuensi tinggi: simpan counter tiap interface di RingBuffer,
+    hitung rate bps antar sample, dan sediakan titik downsampled untuk disimpan ke SQLite.
+    """
+    def __init__(self, interval=None, window=None, flush_interval=None):
+        self.interval = interval or getattr(config, 'TRAFFIC_SAMPLE_INTERVAL', 5)
+        self.window = window or getattr(config, 'TRAFFIC_RATE_WINDOW', 300)
+        self.flush_interval = flush_interval or getattr(config, 'TRAFFIC_FLUSH_INTERVAL', 60)
+        self.capacity = max(2, int(self.window // self.interval) + 1)
+        self.buffers = {}
+        self.last_sample_time = None
+        self.last_flush_time = None
+        self.counter_resets = 0
+
+    def record(self, interfaces, timestamp=None):
+        """Tambahkan satu poll /interface (list dict dengan name, rx-byte, tx-byte)"""
+        now = time.time() if timestamp is None else timestamp
+        seen = set()
+
+        for iface in interfaces:
+            name = iface.get('name')
+            if not name:
+                continue
+            seen.add(name)
+            rx = _to_int(iface.get('rx-byte', 0))
+            tx = _to_int(iface.get('tx-byte', 0))
+
+            buffer = self.buffers.get(name)
+            if buffer is None:
+                buffer = self.buffers[name] = RingBuffer(self.capacity)
+
+            rx_bps = tx_bps = NAN
+            last = buffer.last()
+            if last is not None:
+                last_time, last_rx, last_tx = last[:3]
+                elapsed = now - last_time
+                if rx < last_rx or tx < last_tx:
+                    # Counter turun = router reboot atau counter di-reset.
+                    # Interval ini tidak punya rate valid, sample jadi baseline baru.
+                    self.counter_resets += 1
+                elif elapsed > 0:
+                    rx_bps = (rx - last_rx) * 8 / elapsed
+                    tx_bps = (tx - last_tx) * 8 / elapsed
+            buffer.append(now, rx, tx, rx_bps, tx_bps)
+
+        # Interface yang sudah tidak ada (dihapus di router) tidak perlu disimpan lagi
+        for name in [name for name in self.buffers if name not in seen]:
+            del self.buffers[name]
+
+        self.last_sample_time = now
+
+    def rates(self, window=None):
+        """
+        Rate tiap interface dari memori.
+        Return dict nama -> dict(rx_bps, tx_bps, avg_rx_bps, avg_tx_bps, peak_rx_bps, peak_tx_bps, timestamp)
+        """
+        window = window or self.window
+        result = {}
+        for name, buffer in self.buffers.items():
+            last = buffer.last()
+            if last is None:
+                continue
+            since = last[0] - window
+            rx_values = []
+            tx_values = []
+            for i in buffer.recent_indexes(since):
+                if not math.isnan(buffer.rx_bps[i]):
+                    rx_values.append(buffer.rx_bps[i])
+                    tx_values.append(buffer.tx_bps[i])
+            result[name] = {
+                'timestamp': last[0],
+                'rx_bps': last[3],
+                'tx_bps': last[4],
+                'avg_rx_bps': sum(rx_values) / len(rx_values) if rx_values else NAN,
+                'avg_tx_bps': sum(tx_values) / len(tx_values) if tx_values else NAN,
+                'peak_rx_bps': max(rx_values) if rx_values else NAN,
+                'peak_tx_bps': max(tx_values) if tx_values else NAN,
+            }
+        return result
+
+    def flush_due(self, now=None):
+        """True jika sudah waktunya menyimpan titik downsampled ke database"""
+        if self.last_sample_time is None:
+            return False
+        now = self.last_sample_time if now is None else now
+        return self.last_flush_time is None or now - self.last_flush_time >= self.flush_interval
+
+    def flush_points(self):
+        """
+        Titik downsampled untuk Database.save_snapshots: counter terakhir tiap interface.
+        Counter bersifat kumulatif, jadi sample terakhir sudah mewakili seluruh interval flush.
+        """
+        points = []
+        for name, buffer in self.buffers.items():
+            last = buffer.last()
+            if last is not None:
+                points.append((name, last[1], last[2]))
+        self.last_flush_time = self.last_sample_time
+        return points
+
+# Sampler bersama untuk job sampling (main.py) dan command /rate
+sampler = TrafficSampler()
@@ -0,0 +1,105 @@
+import logging
+import time
+import config
+from core.metrics import metrics
+
+class AdaptiveJob:
+    """
+    Job berkala yang menjadwalkan dirinya sendiri (run_once berantai), sehingga
+    satu job tidak pernah berjalan tumpang tindih dengan dirinya sendiri.
+
+    Callback mengembalikan hasil poll:
+      - None / exception  : gagal (router lambat/mati) -> interval mundur eksponensial
+      - kosong ([] / 0)   : tidak ada perubahan       -> interval mundur eksponensial
+      - berisi            : ada perubahan             -> interval kembali ke min_interval
+    """
+    def __init__(self, callback, name, interval, min_interval=None, max_interval=None, backoff=None):
+        self.callback = callback
+        self.name = name
+        self.base_interval = interval
+        self.min_interval = min(interval, min_interval or getattr(config, 'ADAPTIVE_MIN_INTERVAL', interval))
+        self.max_interval = max(interval, max_interval or getattr(config, 'ADAPTIVE_MAX_INTERVAL', interval))
+        self.backoff = backoff or getattr(config, 'ADAPTIVE_BACKOFF', 2)
+        self.interval = interval
+        self.running = False
+        self.planned_at = None
+        self.runs = 0
+        self.failures = 0
+        self.changes = 0
+        self.missed_ticks = 0
+        self.last_duration = 0.0
+        self.last_lag = 0.0
+
+    def schedule(self, job_queue, delay):
+        self.planned_at = time.monotonic() + delay
+        job_queue.run_once(self.run, when=delay, name=self.name)
+
+    async def run(self, context):
+        if self.running:
+            # Tidak seharusnya terjadi (jadwal berantai), tapi tetap dijaga
+            self.missed_ticks += 1
+            return
+
+        self.running = True
+        started = time.monotonic()
+        if self.planned_at is not None:
+            self.last_lag = max(0.0, started - self.planned_at)
+        result = None
+        try:
+            result = await self.callback(context)
+        except Exception as e:
+            logging.error(f"❌ Error in job {self.name}: {e}")
+        finally:
+            self.running = False
+
+        self.runs += 1
+        self.last_duration = time.monotonic() - started
+        interval = self.interval
+        self._adapt(result)
+        self._record_metrics(result)
+
+        # Tick yang terlewati karena run terlalu lama tidak dikejar, cukup dicatat
+        missed = int(self.last_duration // interval)
+        if missed:
+            self.missed_ticks += missed
+            logging.warning(f"⚠️ Job {self.name} berjalan {self.last_duration:.1f}s, {missed} tick dilewati")
+        delay = self.interval - (self.last_duration % self.interval)
+        self.schedule(context.job_queue, delay)
+
+    def _record_metrics(self, result):
+        metrics.observe("job_duration_seconds", self.last_duration, job=self.name)
+        metrics.observe("job_lag_seconds", self.last_lag, job=self.name)
+        outcome = "failed" if result is None else ("changed" if result else "unchanged")
+        metrics.inc("job_runs_total", job=self.name, result=outcome)
+
+    def _adapt(self, result):
+        if result is None:
+            self.failures += 1
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        elif result:
+            self.changes += 1
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+
+class AdaptiveScheduler:
+    """Kumpulan AdaptiveJob yang didaftarkan ke JobQueue python-telegram-bot"""
+    def __init__(self):
+        self.jobs = {}
+        metrics.gauge("job_interval_seconds", lambda: [({"job": name}, job.interval) for name, job in self.jobs.items()])
+
+    def add(self, job_queue, callback, name, interval, first=0, adaptive=True):
+        """
+        Daftarkan job. adaptive=False: interval tetap, tapi tetap tanpa overlap
+        dan tick yang terlewat tetap dilewati.
+        """
+        if adaptive:
+            job = AdaptiveJob(callback, name, interval)
+        else:
+            job = AdaptiveJob(callback, name, interval, interval, interval, 1)
+        self.jobs[name] = job
+        job.schedule(job_queue, first)
+        return job
+
+# Scheduler bersama untuk job polling di main.py
+scheduler = AdaptiveScheduler()
@@ -0,0 +1,144 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import config
+from core.metrics import metrics
+
+# File di bawah folder ini dianggap kode bot (untuk menandai handler/job dan call site di stack)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class LoopWatchdog:
+    """
+    Deteksi event loop yang macet (ada kode sinkron yang memblokir di dalam coroutine).
+
+    Heartbeat di event loop mencatat lag tiap interval ke metrics (event_loop_lag_seconds).
+    Thread monitor terpisah mengecek heartbeat; jika tidak berdetak lebih dari threshold detik,
+    stack thread event loop saat itu di-log bersama task yang sedang berjalan, handler/job
+    (frame kode bot terluar) dan call site yang memblokir (frame kode bot terdalam).
+    """
+    def __init__(self, threshold=None, interval=None, stack_limit=25):
+        self.threshold = threshold if threshold is not None else getattr(config, 'LOOP_WATCHDOG_THRESHOLD', 0)
+        self.interval = interval or min(0.1, (self.threshold or 1) / 4)
+        self.stack_limit = stack_limit
+        self.stalls = 0
+        self.beat = None
+        self._reported = False
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Mulai heartbeat dan thread monitor (dari dalam event loop). Return False jika nonaktif"""
+        if not self.threshold:
+            return False
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-watchdog")
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        return True
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        histogram = metrics.histogram("event_loop_lag_seconds")
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            histogram.observe(lag)
+            if self._reported:
+                self._reported = False
+                logging.warning(f"⚠️ Event loop kembali responsif setelah macet {lag + self.interval:.2f}s")
+            self.beat = now
+
+    def _monitor(self):
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self.beat
+            if stalled >= self.threshold and not self._reported:
+                self._reported = True
+                self.stalls += 1
+                metrics.inc("event_loop_stalls_total")
+                self._report(stalled)
+
+    def _report(self, stalled):
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        task = asyncio.current_task(self._loop)
+        task_name = "-"
+        if task is not None:
+            coro = task.get_coro()
+            task_name = f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+        own = [entry for entry in stack if entry.filename.startswith(REPO_ROOT)]
+        entry_point = f"{own[0].name} ({os.path.relpath(own[0].filename, REPO_ROOT)})" if own else "-"
+        call_site = (
+            f"{os.path.relpath(own[-1].filename, REPO_ROOT)}:{own[-1].lineno} {own[-1].name}: {own[-1].line}"
+            if own else "-"
+        )
+        logging.warning(
+            f"⚠️ Event loop macet {stalled:.2f}s | task {task_name} | handler/job {entry_point} | "
+            f"call site {call_site}\n" + "".join(traceback.format_list(stack[-self.stack_limit:]))
+        )
+
+class ProfilerBusy(Exception):
+    """Sudah ada /profile yang sedang berjalan"""
+
+_profile_running = False
+
+async def profile_loop(seconds, limit=40):
+    """
+    cProfile semua kode yang berjalan di thread event loop (handler, job, detector, DB) selama
+    seconds detik. Return laporan teks: fungsi teratas berdasarkan waktu sendiri dan kumulatif.
+    Raise ProfilerBusy jika profil lain masih berjalan.
+    """
+    global _profile_running
+    if _profile_running:
+        raise ProfilerBusy()
+    _profile_running = True
+    profiler = cProfile.Profile()
+    started = time.strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+    finally:
+        _profile_running = False
+
+    stream = io.StringIO()
+    stream.write(f"Profile event loop {seconds:g}s, mulai {started}\n")
+    stream.write("select/poll (selectors.py) = event loop idle menunggu I/O, bukan beban\n\n")
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs()
+    stream.write(f"=== Top {limit} berdasarkan tottime (waktu di fungsi itu sendiri) ===\n")
+    stats.sort_stats("tottime").print_stats(limit)
+    stream.write(f"=== Top {limit} berdasarkan cumtime (termasuk fungsi yang dipanggil) ===\n")
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+# Watchdog bersama, diaktifkan di main.py jika LOOP_WATCHDOG_THRESHOLD diset
+watchdog = LoopWatchdog()
@@ -1,27 +1,84 @@
 # handlers/commands.py
+import asyncio
+import io
 import logging
-import os
+import math
+import time
 from datetime import datetime
+from telegram.error import BadRequest, TelegramError
 import config
-from core.router_api import RouterAPI
-from core.database import Database
-from utils.formatter import format_bytes
+from core.router_api import api, BackupTooLarge, ERROR_COUNTER_KEYS
+from core.backup import backup_runner, BackupError
+from core.sampler import sampler
+from core.client_index import client_index
+from core.metrics import metrics
+from core.notifier import notifier
+from core.scheduler import scheduler
+from core.watchdog import profile_loop, ProfilerBusy
+from handlers.events import db
+from utils.formatter import format_bytes, format_bps, format_seconds, split_lines
 from utils.decorators import restricted
+from utils.pagination import PageCache, page_bounds, page_keyboard
 
-api = RouterAPI()
-db = Database()
+
+# Property yang ditampilkan tiap command (.proplist)
+TRAFFIC_FIELDS = ['name', 'rx-byte', 'tx-byte']
+DHCP_FIELDS = ['address', 'mac-address', 'host-name', 'active', 'expires-after']
+HOTSPOT_FIELDS = ['name', 'address', 'mac-address']
+INTERFACE_FIELDS = ['name', 'running', 'disabled', 'link-speed', 'rx-error', 'tx-error', 'rx-drop', 'tx-drop']
+
+# Jumlah entry per halaman /dhcp dan /hotspot
+PAGE_SIZE = 20
+
+# Maksimal hasil yang ditampilkan /find
+FIND_LIMIT = 30
+
+# Snapshot /dhcp dan /hotspot per chat untuk pindah halaman tanpa query ulang ke router
+page_cache = PageCache()
+
+# Jarak minimal antar edit pesan progress download backup (detik)
+BACKUP_PROGRESS_INTERVAL = 2
+
+# Jumlah operasi DB (total waktu terbesar) yang ditampilkan /stats
+STATS_DB_OPERATIONS = 6
+
+# Durasi /profile default dan maksimal (detik)
+PROFILE_DEFAULT_SECONDS = 10
+PROFILE_MAX_SECONDS = 300
+
+async def _reply_unreachable(update, path, fields=None):
+    """
+    Balas langsung bahwa router tidak bisa dihubungi (circuit endpoint path open).
+    Return data cache terakhir untuk path/fields supaya handler bisa menampilkannya,
+    None jika tidak ada.
+    """
+    msg = f"📡 Router tidak bisa dihubungi, coba lagi dalam {api.retry_after(path):.0f}s."
+    cached = api.last_known(path, fields)
+    if cached is None:
+        await update.message.reply_text(msg)
+        return None
+    age, data = cached
+    await update.message.reply_text(f"{msg}\nMenampilkan data terakhir ({format_seconds(age)} lalu).")
+    return data
 
 @restricted
 async def traffic_handler(update, context):
     args = context.args
     period = args[0] if args else None
     
-    interfaces = api.get_interfaces()
+    interfaces = await api.get_interfaces(TRAFFIC_FIELDS)
+    if interfaces is None and api.is_unreachable("interface"):
+        interfaces = await _reply_unreachable(update, "interface", TRAFFIC_FIELDS)
+        if interfaces is None:
+            return
     if interfaces is None:
         # Tambahkan await di sini
         await update.message.reply_text("❌ Gagal mengambil data interface.")
         return
 
+    # Baseline semua interface diambil dengan satu query
+    baselines = db.get_past_data_bulk([iface.get('name') for iface in interfaces], period) if period else {}
+
     msg = f"📊 **Laporan Trafik**\n"
     msg += f"Periode: `{period if period else 'Real-time (Total)'}`\n"
     msg += "━━━━━━━━━━━━━━━━━━\n"
@@ -32,7 +89,7 @@ async def traffic_handler(update, context):
         curr_tx = int(iface.get('tx-byte', 0))
 
         if period:
-            past_data = db.get_past_data(name, period)
+            past_data = baselines.get(name)
             if past_data:
                 past_rx, past_tx = past_data
                 display_rx = max(0, curr_rx - past_rx)
@@ -50,9 +107,18 @@ async def traffic_handler(update, context):
     # Tambahkan await di sini (baris 48 yang bermasalah di log kamu)
     await update.message.reply_text(msg, parse_mode='Markdown')
 
+async def _edit_status(message, text):
+    """Edit status message, error Telegram (mis. teks sama / rate limit) diabaikan"""
+    try:
+        await message.edit_text(text)
+    except TelegramError as e:
+        logging.debug(f"Status message tidak di-update: {e}")
+
 @restricted
 async def backup_handler(update, context):
-    """Handle /backup command - backup router configuration"""
+    """Handle /backup [force] command - backup router configuration"""
+    # Backup yang isinya sama dengan backup terakhir tidak dikirim ulang, kecuali /backup force
+    force = bool(context.args) and context.args[0].lower() == "force"
     try:
         # Send status message
         status_msg = await update.message.reply_text(
@@ -60,76 +126,48 @@ async def backup_handler(update, context):
             parse_mode='Markdown'
         )
         
-        # Trigger backup
-        logging.info("Triggering router backup...")
-        backup_result = api.backup_router()
-        
-        if backup_result is None:
-            await status_msg.edit_text(
-                "❌ Gagal memicu backup router. Pastikan router API accessible.",
-                parse_mode='Markdown'
-            )
-            return
-        
-        await status_msg.edit_text(
-            "⏳ Download backup file dari router...",
-            parse_mode='Markdown'
-        )
-        
-        # Download backup file
-        backup_file_path = api.download_backup()
-        
-        if backup_file_path is None:
-            await status_msg.edit_text(
-                "❌ Gagal download backup file. Pastikan file tersedia di router.",
-                parse_mode='Markdown'
-            )
-            return
-        
-        # Check file size
-        file_size = os.path.getsize(backup_file_path)
-        max_size = getattr(config, 'MAX_BACKUP_SIZE_MB', 50) * 1024 * 1024  # Default 50MB
-        
-        if file_size > max_size:
+        # Save backup di router, tunggu file selesai, lalu download (streaming).
+        # /backup yang datang bersamaan ikut menunggu proses yang sama.
+        # Progress download ditampilkan dengan edit status message di task terpisah
+        # supaya download tidak menunggu Telegram.
+        last_edit = time.monotonic()
+        progress_task = None
+
+        async def report_progress(received, total):
+            nonlocal last_edit, progress_task
+            now = time.monotonic()
+            if now - last_edit < BACKUP_PROGRESS_INTERVAL or (progress_task and not progress_task.done()):
+                return
+            last_edit = now
+            text = f"⏳ Download backup: {format_bytes(received)}"
+            if total:
+                text += f" / {format_bytes(total)} ({received * 100 // total}%)"
+            progress_task = asyncio.create_task(_edit_status(status_msg, text))
+
+        try:
+            async with backup_runner.run(report_progress) as backup:
+                if progress_task is not None:
+                    await progress_task
+                if backup['changed'] or force:
+                    await _send_backup(update, status_msg, backup)
+                else:
+                    previous_time = datetime.fromtimestamp(backup['previous'][1]).strftime("%Y-%m-%d %H:%M:%S")
+                    await status_msg.edit_text(
+                        f"✅ Konfigurasi router tidak berubah sejak backup `{previous_time}`\n"
+                        f"SHA256: `{backup['sha256'][:16]}`\n"
+                        f"File tidak dikirim ulang, gunakan `/backup force` untuk tetap mengirim.",
+                        parse_mode='Markdown'
+                    )
+        except BackupTooLarge as e:
             await status_msg.edit_text(
-                f"❌ File backup terlalu besar: {format_bytes(file_size)} (max: {format_bytes(max_size)})",
-                parse_mode='Markdown'
-            )
-            # Clean up
-            os.remove(backup_file_path)
-            return
-        
-        # Send file to user
-        await status_msg.edit_text(
-            "⏳ Mengirim file backup...",
-            parse_mode='Markdown'
-        )
-        
-        router_info = api.get_system_identity()
-        router_name = router_info.get('name', 'MikroTik-Router') if router_info else 'MikroTik-Router'
-        
-        # Create descriptive filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"{router_name}_backup_{timestamp}.backup"
-        
-        with open(backup_file_path, 'rb') as f:
-            await update.message.reply_document(
-                document=f,
-                filename=backup_filename,
-                caption=f"✅ **Backup Berhasil**\n"
-                        f"Router: `{router_name}`\n"
-                        f"Ukuran: `{format_bytes(file_size)}`\n"
-                        f"Waktu: `{timestamp}`",
+                f"❌ File backup terlalu besar: {format_bytes(e.size)} (max: {format_bytes(e.limit)})",
                 parse_mode='Markdown'
             )
-        
-        # Delete status message
-        await status_msg.delete()
-        
-        logging.info(f"✅ Backup file sent: {backup_filename} ({format_bytes(file_size)})")
-        
-        # Clean up temp file
-        os.remove(backup_file_path)
+        except BackupError as e:
+            await status_msg.edit_text(f"❌ {e}", parse_mode='Markdown')
+        finally:
+            if progress_task is not None and not progress_task.done():
+                progress_task.cancel()
         
     except Exception as e:
         logging.error(f"❌ Error in backup handler: {e}")
@@ -138,35 +176,104 @@ async def backup_handler(update, context):
             parse_mode='Markdown'
         )
 
+async def _send_backup(update, status_msg, backup):
+    """Kirim file hasil backup ke user"""
+    file_size = backup['size']
+    
+    # Send file to user
+    await status_msg.edit_text(
+        "⏳ Mengirim file backup...",
+        parse_mode='Markdown'
+    )
+    
+    router_info = await api.get_system_identity()
+    router_name = router_info.get('name', 'MikroTik-Router') if router_info else 'MikroTik-Router'
+    
+    # Create descriptive filename
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_filename = f"{router_name}_backup_{timestamp}.backup"
+    
+    with open(backup['path'], 'rb') as f:
+        await update.message.reply_document(
+            document=f,
+            filename=backup_filename,
+            caption=f"✅ **Backup Berhasil**\n"
+                    f"Router: `{router_name}`\n"
+                    f"Ukuran: `{format_bytes(file_size)}`\n"
+                    f"SHA256: `{backup['sha256'][:16]}`\n"
+                    f"Waktu: `{timestamp}`",
+            parse_mode='Markdown'
+        )
+    
+    # Delete status message
+    await status_msg.delete()
+    
+    logging.info(f"✅ Backup file sent: {backup_filename} ({format_bytes(file_size)})")
+
+def render_dhcp_page(dhcp_leases, page):
+    """Teks satu halaman /dhcp, return (text, page, pages)"""
+    page, pages, start, end = page_bounds(len(dhcp_leases), page, PAGE_SIZE)
+    msg = f"📋 **DHCP Leases** ({len(dhcp_leases)} active)\n"
+    msg += "━━━━━━━━━━━━━━━━━━\n\n"
+    
+    for i, lease in enumerate(dhcp_leases[start:end], start + 1):
+        ip = lease.get('address', 'N/A')
+        mac = lease.get('mac-address', 'N/A')
+        hostname = lease.get('host-name', 'N/A')
+        active = "✅" if lease.get('active') else "❌"
+        expires = lease.get('expires-after', 'N/A')
+        
+        msg += f"{i}. {active} **{hostname}**\n"
+        msg += f"   IP: `{ip}`\n"
+        msg += f"   MAC: `{mac}`\n"
+        msg += f"   Expires: `{expires}s`\n\n"
+    return msg, page, pages
+
+def render_hotspot_page(sessions, page):
+    """Teks satu halaman /hotspot, return (text, page, pages)"""
+    page, pages, start, end = page_bounds(len(sessions), page, PAGE_SIZE)
+    msg = f"🔓 **Active Hotspot Users** ({len(sessions)} online)\n"
+    msg += "━━━━━━━━━━━━━━━━━━\n\n"
+    
+    for i, session in enumerate(sessions[start:end], start + 1):
+        username = session.get('name', 'N/A')
+        ip = session.get('address', 'N/A')
+        mac = session.get('mac-address', 'N/A')
+        
+        msg += f"{i}. 👤 **{username}**\n"
+        msg += f"   IP: `{ip}`\n"
+        msg += f"   MAC: `{mac}`\n\n"
+    return msg, page, pages
+
+# Renderer halaman per jenis snapshot (bagian <kind> di callback data "page:<kind>:<token>:<page>")
+PAGE_RENDERERS = {
+    "dhcp": render_dhcp_page,
+    "hotspot": render_hotspot_page,
+}
+
+async def _reply_paged(update, kind, rows):
+    """Simpan snapshot rows untuk chat ini dan kirim halaman pertama dengan tombol navigasi"""
+    token = page_cache.put(update.effective_chat.id, kind, rows)
+    msg, page, pages = PAGE_RENDERERS[kind](rows, 0)
+    await update.message.reply_text(
+        msg, parse_mode='Markdown', reply_markup=page_keyboard(kind, token, page, pages)
+    )
+
 @restricted
 async def dhcp_handler(update, context):
     """Handle /dhcp command - show current DHCP leases"""
     try:
-        dhcp_leases = api.get_dhcp_leases()
+        dhcp_leases = await api.get_dhcp_leases(DHCP_FIELDS)
+        if dhcp_leases is None and api.is_unreachable("ip/dhcp-server/lease"):
+            dhcp_leases = await _reply_unreachable(update, "ip/dhcp-server/lease", DHCP_FIELDS)
+            if not dhcp_leases:
+                return
         
         if not dhcp_leases:
             await update.message.reply_text("❌ Gagal mengambil data DHCP lease.")
             return
         
-        msg = f"📋 **DHCP Leases** ({len(dhcp_leases)} active)\n"
-        msg += "━━━━━━━━━━━━━━━━━━\n\n"
-        
-        for i, lease in enumerate(dhcp_leases[:20], 1):  # Limit to 20 to avoid message too long
-            ip = lease.get('address', 'N/A')
-            mac = lease.get('mac-address', 'N/A')
-            hostname = lease.get('host-name', 'N/A')
-            active = "✅" if lease.get('active') else "❌"
-            expires = lease.get('expires-after', 'N/A')
-            
-            msg += f"{i}. {active} **{hostname}**\n"
-            msg += f"   IP: `{ip}`\n"
-            msg += f"   MAC: `{mac}`\n"
-            msg += f"   Expires: `{expires}s`\n\n"
-        
-        if len(dhcp_leases) > 20:
-            msg += f"... dan {len(dhcp_leases) - 20} lainnya"
-        
-        await update.message.reply_text(msg, parse_mode='Markdown')
+        await _reply_paged(update, "dhcp", dhcp_leases)
         
     except Exception as e:
         logging.error(f"❌ Error in dhcp handler: {e}")
@@ -176,38 +283,99 @@ async def dhcp_handler(update, context):
 async def hotspot_handler(update, context):
     """Handle /hotspot command - show current hotspot active users"""
     try:
-        sessions = api.get_hotspot_sessions()
+        sessions = await api.get_hotspot_sessions(HOTSPOT_FIELDS)
+        if sessions is None and api.is_unreachable("ip/hotspot/active"):
+            sessions = await _reply_unreachable(update, "ip/hotspot/active", HOTSPOT_FIELDS)
+            if not sessions:
+                return
         
         if not sessions:
             await update.message.reply_text("❌ Gagal mengambil data hotspot sessions.")
             return
         
-        msg = f"🔓 **Active Hotspot Users** ({len(sessions)} online)\n"
-        msg += "━━━━━━━━━━━━━━━━━━\n\n"
+        await _reply_paged(update, "hotspot", sessions)
         
-        for i, session in enumerate(sessions[:20], 1):  # Limit to 20
-            username = session.get('name', 'N/A')
-            ip = session.get('address', 'N/A')
-            mac = session.get('mac-address', 'N/A')
-            
-            msg += f"{i}. 👤 **{username}**\n"
-            msg += f"   IP: `{ip}`\n"
-            msg += f"   MAC: `{mac}`\n\n"
+    except Exception as e:
+        logging.error(f"❌ Error in hotspot handler: {e}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+@restricted
+async def find_handler(update, context):
+    """Handle /find <mac|ip|prefix ip|hostname> - cari client dari index detector (tanpa query ke router)"""
+    try:
+        if not context.args:
+            await update.message.reply_text(
+                "Gunakan: `/find <MAC | IP | prefix IP | hostname/username>`\n"
+                "Contoh: `/find 192.168.88.` atau `/find android`",
+                parse_mode='Markdown'
+            )
+            return
+        
+        query = " ".join(context.args)
+        if len(client_index) == 0:
+            await update.message.reply_text("⏳ Index client belum terisi, tunggu poll DHCP/hotspot pertama.")
+            return
         
-        if len(sessions) > 20:
-            msg += f"... dan {len(sessions) - 20} lainnya"
+        total, results = client_index.search(query, FIND_LIMIT)
+        if total == 0:
+            await update.message.reply_text(f"🔍 Tidak ada client yang cocok dengan `{query}`.", parse_mode='Markdown')
+            return
         
-        await update.message.reply_text(msg, parse_mode='Markdown')
+        lines = []
+        for source, record in results:
+            if source == "dhcp":
+                active = "✅" if record.active else "❌"
+                lines.append(f"📋 {active} **{record.hostname or 'N/A'}** | `{record.address}` | `{record.mac}`")
+            else:
+                lines.append(f"🔓 👤 **{record.name}** | `{record.address}` | `{record.mac}`")
+        if total > len(results):
+            lines.append(f"... dan {total - len(results)} lainnya")
+        
+        header = f"🔍 **Hasil /find** `{query}` ({total} client)\n━━━━━━━━━━━━━━━━━━\n"
+        for chunk in split_lines(header, lines):
+            await update.message.reply_text(chunk, parse_mode='Markdown')
         
     except Exception as e:
-        logging.error(f"❌ Error in hotspot handler: {e}")
+        logging.error(f"❌ Error in find handler: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+@restricted
+async def page_callback(update, context):
+    """Handle tombol pagination /dhcp dan /hotspot: render halaman dari snapshot, edit pesan"""
+    query = update.callback_query
+    try:
+        _, kind, token, page = query.data.split(':')
+        rows = page_cache.get(query.message.chat_id, kind, token)
+        if rows is None or kind not in PAGE_RENDERERS:
+            await query.answer(f"⌛ Data sudah kedaluwarsa, jalankan /{kind} lagi.", show_alert=True)
+            return
+        
+        await query.answer()
+        msg, page, pages = PAGE_RENDERERS[kind](rows, int(page))
+        await query.edit_message_text(
+            msg, parse_mode='Markdown', reply_markup=page_keyboard(kind, token, page, pages)
+        )
+    except BadRequest as e:
+        # Halaman yang sama ditekan lagi: Telegram menolak edit tanpa perubahan
+        if "not modified" not in str(e):
+            logging.error(f"❌ Error in page callback: {e}")
+    except Exception as e:
+        logging.error(f"❌ Error in page callback: {e}")
+
 @restricted
 async def interface_handler(update, context):
     """Handle /interface command - show all interface status"""
     try:
-        interfaces = api.get_interfaces_detail()
+        interfaces = await api.get_interfaces_detail(INTERFACE_FIELDS)
+        if interfaces is None and api.is_unreachable("interface"):
+            interfaces = await _reply_unreachable(update, "interface", INTERFACE_FIELDS)
+            if not interfaces:
+                return
+            # Data cache mentah: counter error/drop masih string dari REST API
+            interfaces = [
+                {**iface, **{key: int(iface.get(key) or 0) for key in ERROR_COUNTER_KEYS}}
+                for iface in interfaces
+            ]
         
         if not interfaces:
             await update.message.reply_text("❌ Gagal mengambil data interface.")
@@ -248,4 +416,139 @@ async def interface_handler(update, context):
         
     except Exception as e:
         logging.error(f"❌ Error in interface handler: {e}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+@restricted
+async def rate_handler(update, context):
+    """Handle /rate command - throughput real-time dari sampler (tanpa request ke router)"""
+    try:
+        name_filter = context.args[0] if context.args else None
+        rates = sampler.rates()
+        if name_filter:
+            rates = {name: rate for name, rate in rates.items() if name == name_filter}
+
+        if not rates:
+            await update.message.reply_text("⏳ Belum ada data rate. Tunggu beberapa detik lalu coba lagi.")
+            return
+
+        msg = f"⚡ **Throughput Real-time**\n"
+        msg += f"Window: `{sampler.window}s` | Sample: `{sampler.interval}s`\n"
+        msg += "━━━━━━━━━━━━━━━━━━\n"
+
+        names = sorted(rates)
+        for name in names[:25]:  # Limit to 25
+            rate = rates[name]
+            msg += f"🌐 *{name}*\n"
+            msg += f"  📥 RX: `{format_bps(rate['rx_bps'])}` (avg `{format_bps(rate['avg_rx_bps'])}`, peak `{format_bps(rate['peak_rx_bps'])}`)\n"
+            msg += f"  📤 TX: `{format_bps(rate['tx_bps'])}` (avg `{format_bps(rate['avg_tx_bps'])}`, peak `{format_bps(rate['peak_tx_bps'])}`)\n\n"
+
+        if len(names) > 25:
+            msg += f"... dan {len(names) - 25} lainnya"
+
+        await update.message.reply_text(msg, parse_mode='Markdown')
+
+    except Exception as e:
+        logging.error(f"❌ Error in rate handler: {e}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+def _stats_lines():
+    """Baris /stats dari registry metrics (router, job, DB, notifikasi)"""
+    lines = [f"⏳ Uptime: `{format_seconds(time.time() - metrics.started)}`", "", "🌐 **Router API**"]
+    requests = metrics.series("router_request_duration_seconds")
+    for labels, histogram in sorted(requests, key=lambda item: -item[1].count):
+        method, path = labels['method'], labels['path']
+        errors = histogram.count - metrics.counter_total("router_requests_total", method=method, path=path, status="200")
+        size = metrics.counter_total("router_response_bytes_total", method=method, path=path)
+        line = (f"`{method} {path}` {histogram.count}x | p50 `{format_seconds(histogram.quantile(0.5))}`"
+                f" p95 `{format_seconds(histogram.quantile(0.95))}` | {format_bytes(size)}")
+        if errors:
+            line += f" | ❌ {errors}"
+        lines.append(line)
+    if not requests:
+        lines.append("Belum ada request")
+    hits = metrics.counter_total("router_cache_total", result="hit")
+    lookups = metrics.counter_total("router_cache_total")
+    if lookups:
+        coalesced = metrics.counter_total("router_cache_total", result="coalesced")
+        lines.append(f"Cache hit `{hits / lookups:.0%}` | coalesced `{coalesced}` dari {lookups} lookup")
+
+    lines += ["", "⏱️ **Jobs**"]
+    lags = {labels['job']: histogram for labels, histogram in metrics.series("job_lag_seconds")}
+    jobs = sorted(metrics.series("job_duration_seconds"), key=lambda item: item[0]['job'])
+    if not jobs:
+        lines.append("Belum ada job yang berjalan")
+    for labels, histogram in jobs:
+        name = labels['job']
+        line = f"`{name}` {histogram.count}x | durasi p95 `{format_seconds(histogram.quantile(0.95))}`"
+        if name in lags:
+            line += f" | lag p95 `{format_seconds(lags[name].quantile(0.95))}`"
+        failed = metrics.counter_total("job_runs_total", job=name, result="failed")
+        if failed:
+            line += f" | ❌ {failed}"
+        if name in scheduler.jobs:
+            line += f" | interval `{format_seconds(scheduler.jobs[name].interval)}`"
+        lines.append(line)
+
+    lines += ["", "🗄️ **Database**"]
+    operations = sorted(metrics.series("db_query_duration_seconds"), key=lambda item: -item[1].sum)
+    for labels, histogram in operations[:STATS_DB_OPERATIONS]:
+        lines.append(
+            f"`{labels['operation']}` {histogram.count}x | avg `{format_seconds(histogram.sum / histogram.count)}`"
+            f" p95 `{format_seconds(histogram.quantile(0.95))}` | total `{format_seconds(histogram.sum)}`"
+        )
+
+    lines += ["", "📨 **Notifikasi**",
+              f"Terkirim `{notifier.sent}` | gagal `{notifier.failed}` | retry `{notifier.retried}` | antrian `{notifier.pending()}`"]
+    send = metrics.series("notification_send_duration_seconds")
+    if send:
+        send_count = sum(histogram.count for _, histogram in send)
+        send_sum = sum(histogram.sum for _, histogram in send)
+        worst = max((histogram.quantile(0.95) for _, histogram in metrics.series("notification_delivery_seconds")), default=0)
+        lines.append(f"Kirim avg `{format_seconds(send_sum / send_count)}` | sampai terkirim p95 `{format_seconds(worst)}`")
+    return lines
+
+@restricted
+async def stats_handler(update, context):
+    """Handle /stats command - ringkasan metrics bot (latency router, job, DB, notifikasi)"""
+    try:
+        header = "📊 **Bot Stats**\n━━━━━━━━━━━━━━━━━━\n"
+        for chunk in split_lines(header, _stats_lines()):
+            await update.message.reply_text(chunk, parse_mode='Markdown')
+    except Exception as e:
+        logging.error(f"❌ Error in stats handler: {e}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+@restricted
+async def profile_handler(update, context):
+    """Handle /profile <detik> - cProfile event loop bot selama N detik, kirim hot spot sebagai file"""
+    try:
+        try:
+            seconds = float(context.args[0]) if context.args else PROFILE_DEFAULT_SECONDS
+            if not math.isfinite(seconds):
+                raise ValueError(seconds)
+        except ValueError:
+            await update.message.reply_text(
+                f"Gunakan: `/profile <detik>` (1-{PROFILE_MAX_SECONDS}, default {PROFILE_DEFAULT_SECONDS})",
+                parse_mode='Markdown'
+            )
+            return
+        seconds = min(max(seconds, 1), PROFILE_MAX_SECONDS)
+
+        status_msg = await update.message.reply_text(f"🔬 Profiling event loop selama {seconds:g}s...")
+        try:
+            report = await profile_loop(seconds)
+        except ProfilerBusy:
+            await _edit_status(status_msg, "⏳ Profiling lain masih berjalan, coba lagi nanti.")
+            return
+
+        filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        await update.message.reply_document(
+            document=io.BytesIO(report.encode()),
+            filename=filename,
+            caption=f"🔬 **Profile** `{seconds:g}s` - hot spot berdasarkan tottime dan cumtime",
+            parse_mode='Markdown'
+        )
+        await status_msg.delete()
+    except Exception as e:
+        logging.error(f"❌ Error in profile handler: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
\ No newline at end of file
@@ -1,14 +1,69 @@
 import logging
-from core.router_api import RouterAPI
+import time
+import config
 from core.database import Database
+from core.client_index import client_index
+from core.detector import (
+    DetectorState, DhcpRecord, HotspotRecord, InterfaceRecord, TRUE_VALUES, parse_duration, to_bool
+)
 
-api = RouterAPI()
+# Database bersama (satu koneksi persisten) untuk detector, command handler dan job di main.py.
+# Dibuat di sini, bukan di core/database.py, supaya traffic.db baru dibuka saat handler
+# di-import (benchmark meng-import core.database dari direktori mana pun).
 db = Database()
 
-# State tracking untuk event detection
-last_hotspot_sessions = {}
-last_dhcp_leases = {}
-last_interface_states = {}  # Track interface status
+# Property yang dibutuhkan tiap detector (.proplist), sisanya tidak diambil dari router
+HOTSPOT_EVENT_FIELDS = ['name', 'mac-address', 'address']
+DHCP_EVENT_FIELDS = ['mac-address', 'address', 'host-name', 'active', 'expires-after']
+INTERFACE_EVENT_FIELDS = ['name', 'running', 'disabled', 'link-speed', 'rx-error', 'tx-error']
+
+# Waktu kadaluarsa lease dibulatkan ke resolusi ini (detik), supaya countdown
+# expires-after dan jitter waktu poll tidak membuat semua lease "berubah" tiap tick.
+# Renew = waktu kadaluarsa maju lebih dari satu resolusi.
+LEASE_EXPIRY_RESOLUTION = 60
+
+# State tracking untuk event detection (record ringkas + fingerprint per entry)
+# Fingerprint dari record harus sama dengan fingerprint dari row mentah di _*_items
+hotspot_state = DetectorState(
+    "hotspot", HotspotRecord,
+    lambda record: (record.name, record.mac),
+    lambda record: hash(record.address)
+)
+dhcp_state = DetectorState(
+    "dhcp", DhcpRecord,
+    lambda record: record.mac,
+    lambda record: hash((record.address, record.hostname, record.active, record.expires_at))
+)
+interface_state = DetectorState(
+    "interface", InterfaceRecord,
+    lambda record: record.name,
+    lambda record: hash(record.status)
+)
+
+def _checkpoint(state, new, changed, removed):
+    """Simpan perubahan state detector ke DB (dipanggil di dalam db.batch() tick yang sama)"""
+    db.save_detector_state(state.name, *state.checkpoint(new, changed, removed))
+
+def restore_detector_state():
+    """
+    Muat state detector dari checkpoint terakhir, dipanggil sekali saat startup.
+    Tick pertama setelah restart jadi diff biasa (bukan semua entry dianggap baru),
+    dan logout/release selama bot mati tetap terdeteksi.
+    """
+    max_age = getattr(config, 'DETECTOR_STATE_MAX_AGE', 86400)
+    for state in (hotspot_state, dhcp_state, interface_state):
+        updated_at, rows = db.get_detector_state(state.name)
+        if updated_at is None:
+            continue
+        age = time.time() - updated_at
+        if max_age and age > max_age:
+            logging.info(f"ℹ️ Checkpoint detector {state.name} sudah {age / 3600:.1f} jam, tidak dipakai")
+            db.clear_detector_state(state.name)
+            continue
+        state.restore(rows)
+        if state is not interface_state:
+            client_index.apply(state, list(state.records.values()), [], [])
+        logging.info(f"✅ State detector {state.name} dimuat: {len(state)} entry")
 
 def format_hotspot_login_message(username, mac_address, ip_address):
     """Format pesan untuk hotspot login"""
@@ -52,148 +107,179 @@ def format_dhcp_event_message(mac_address, ip_address, hostname, event_type, lea
     msg += f"⏰ Time: `{get_current_time()}`\n"
     return msg
 
+def format_hotspot_summary(username, mac_address, ip_address):
+    """Ringkasan satu baris hotspot event untuk pesan digest"""
+    return f"👤 `{username}` | `{ip_address}` | `{mac_address}`"
+
+def format_dhcp_summary(mac_address, ip_address, hostname):
+    """Ringkasan satu baris DHCP event untuk pesan digest"""
+    line = f"🖥️ `{mac_address}` → `{ip_address}`"
+    if hostname:
+        line += f" (`{hostname}`)"
+    return line
+
 def get_current_time():
     """Dapatkan current time dalam format readable"""
     from datetime import datetime
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-def check_hotspot_events(api):
+def _hotspot_record(session):
+    """Dict session dari router -> HotspotRecord"""
+    return HotspotRecord(
+        session.get('name', 'unknown'),
+        session.get('mac-address', 'unknown'),
+        session.get('address', 'unknown')
+    )
+
+def _hotspot_items(sessions):
+    """(key, fingerprint, session) per session, key = (username, mac)"""
+    for session in sessions:
+        key = (session.get('name', 'unknown'), session.get('mac-address', 'unknown'))
+        yield key, hash(session.get('address', 'unknown')), session
+
+async def check_hotspot_events(api):
     """
     Check untuk hotspot login/logout events.
     Membandingkan current active sessions dengan last state.
-    Return: List of tuples (message, event_type)
+    Return: List of tuples (message, event_type, summary), None jika data gagal diambil
     """
-    global last_hotspot_sessions
-    
     events = []
     
     try:
         # Ambil current active hotspot sessions
-        current_sessions = api.get_hotspot_sessions()
+        current_sessions = await api.get_hotspot_sessions(HOTSPOT_EVENT_FIELDS)
         
         if current_sessions is None:
             logging.warning("⚠️ Gagal mengambil hotspot sessions")
-            return events
+            return None
         
         if not isinstance(current_sessions, list):
             logging.warning("⚠️ Hotspot sessions bukan list")
             return events
         
-        # Buat dict untuk tracking (key = username:mac)
-        current_dict = {}
-        for session in current_sessions:
-            key = f"{session.get('name', 'unknown')}:{session.get('mac-address', 'unknown')}"
-            current_dict[key] = session
+        logins, changed_sessions, logouts = hotspot_state.diff(_hotspot_items(current_sessions), _hotspot_record)
+        client_index.apply(hotspot_state, logins, changed_sessions, logouts)
         
-        # Detect new logins
-        for key, session in current_dict.items():
-            if key not in last_hotspot_sessions:
-                username = session.get('name', 'unknown')
-                mac = session.get('mac-address', 'unknown')
-                ip = session.get('address', 'unknown')
-                
-                msg = format_hotspot_login_message(username, mac, ip)
-                events.append((msg, "hotspot_login"))
+        # Semua write DB di tick ini masuk satu transaksi
+        with db.batch():
+            # Detect new logins
+            for session in logins:
+                msg = format_hotspot_login_message(session.name, session.mac, session.address)
+                events.append((msg, "hotspot_login", format_hotspot_summary(session.name, session.mac, session.address)))
                 
                 # Log ke database
-                db.save_hotspot_login(username, mac, ip)
-                logging.info(f"✅ Hotspot Login: {username} ({ip})")
+                db.save_hotspot_login(session.name, session.mac, session.address)
+                logging.info(f"✅ Hotspot Login: {session.name} ({session.address})")
         
-        # Detect logouts
-        for key in last_hotspot_sessions:
-            if key not in current_dict:
-                session = last_hotspot_sessions[key]
-                username = session.get('name', 'unknown')
-                mac = session.get('mac-address', 'unknown')
-                ip = session.get('address', 'unknown')
-                
-                msg = format_hotspot_logout_message(username, mac, ip)
-                events.append((msg, "hotspot_logout"))
+            # Detect logouts
+            for session in logouts:
+                msg = format_hotspot_logout_message(session.name, session.mac, session.address)
+                events.append((msg, "hotspot_logout", format_hotspot_summary(session.name, session.mac, session.address)))
                 
                 # Log ke database
-                db.save_hotspot_logout(username, mac)
-                logging.info(f"✅ Hotspot Logout: {username}")
-        
-        # Update last state
-        last_hotspot_sessions = current_dict
+                db.save_hotspot_logout(session.name, session.mac)
+                logging.info(f"✅ Hotspot Logout: {session.name}")
+            
+            _checkpoint(hotspot_state, logins, changed_sessions, logouts)
         
     except Exception as e:
         logging.error(f"❌ Error checking hotspot events: {e}")
     
     return events
 
-def check_dhcp_events(api):
+def _lease_expires_at(expires_after, now):
+    """Waktu kadaluarsa absolut (epoch, dibulatkan), 0 untuk lease tanpa expires-after (static)"""
+    if not expires_after:
+        return 0
+    return (int(now) + expires_after + LEASE_EXPIRY_RESOLUTION // 2) // LEASE_EXPIRY_RESOLUTION * LEASE_EXPIRY_RESOLUTION
+
+def _dhcp_record(lease, now):
+    """Dict lease dari router -> DhcpRecord"""
+    expires_after = parse_duration(lease.get('expires-after', 0))
+    return DhcpRecord(
+        lease.get('mac-address', 'unknown'),
+        lease.get('address', 'unknown'),
+        lease.get('host-name', ''),
+        to_bool(lease.get('active', False)),
+        expires_after,
+        _lease_expires_at(expires_after, now)
+    )
+
+def _dhcp_items(leases, now):
+    """(key, fingerprint, lease) per lease, key = mac-address"""
+    # Loop ini jalan untuk setiap lease tiap tick, jadi _lease_expires_at dan to_bool di-inline.
+    # Fingerprint harus sama dengan field DhcpRecord (address, hostname, active, expires_at).
+    resolution = LEASE_EXPIRY_RESOLUTION
+    rounding = int(now) + resolution // 2
+    for lease in leases:
+        get = lease.get
+        expires_after = parse_duration(get('expires-after', 0))
+        expires_at = (rounding + expires_after) // resolution * resolution if expires_after else 0
+        active = get('active', False)
+        if isinstance(active, str):
+            active = active.lower()
+        fingerprint = hash((get('address', 'unknown'), get('host-name', ''), active in TRUE_VALUES, expires_at))
+        yield get('mac-address', 'unknown'), fingerprint, lease
+
+async def check_dhcp_events(api, now=None):
     """
     Check untuk DHCP lease events (new, renew, release, expired).
     Membandingkan current leases dengan last state.
-    Return: List of tuples (message, event_type)
+    now: waktu poll (epoch) untuk menghitung waktu kadaluarsa lease, default time.time()
+         (replay rekaman memakai timestamp rekaman supaya hasilnya deterministik)
+    Return: List of tuples (message, event_type, summary), None jika data gagal diambil
     """
-    global last_dhcp_leases
-    
     events = []
     
     try:
         # Ambil current DHCP leases
-        current_leases = api.get_dhcp_leases()
+        current_leases = await api.get_dhcp_leases(DHCP_EVENT_FIELDS)
         
         if current_leases is None:
             logging.warning("⚠️ Gagal mengambil DHCP leases")
-            return events
+            return None
         
         if not isinstance(current_leases, list):
             logging.warning("⚠️ DHCP leases bukan list")
             return events
         
-        # Buat dict untuk tracking (key = mac-address)
-        current_dict = {}
-        for lease in current_leases:
-            key = lease.get('mac-address', 'unknown')
-            current_dict[key] = lease
+        if now is None:
+            now = time.time()
+        new_leases, changed_leases, released = dhcp_state.diff(
+            _dhcp_items(current_leases, now),
+            lambda lease: _dhcp_record(lease, now)
+        )
+        client_index.apply(dhcp_state, new_leases, changed_leases, released)
         
-        # Detect new leases dan renewals
-        for key, lease in current_dict.items():
-            mac = lease.get('mac-address', 'unknown')
-            ip = lease.get('address', 'unknown')
-            hostname = lease.get('host-name', '')
-            active = lease.get('active', False)
-            expires_after = lease.get('expires-after', 0)
-            
-            if key not in last_dhcp_leases:
-                # New lease
-                msg = format_dhcp_event_message(mac, ip, hostname, "new", expires_after)
-                events.append((msg, "dhcp_new"))
+        # Semua write DB di tick ini masuk satu transaksi
+        with db.batch():
+            # Detect new leases
+            for lease in new_leases:
+                msg = format_dhcp_event_message(lease.mac, lease.address, lease.hostname, "new", lease.expires_after)
+                events.append((msg, "dhcp_new", format_dhcp_summary(lease.mac, lease.address, lease.hostname)))
                 
                 # Log ke database
-                db.save_dhcp_event(mac, ip, hostname, "new", expires_after)
-                logging.info(f"✅ DHCP New Lease: {mac} -> {ip}")
-            else:
-                # Check if renewed (IP same tapi lease time updated)
-                old_lease = last_dhcp_leases[key]
-                old_expires = old_lease.get('expires-after', 0)
-                
-                if expires_after > old_expires and active:
-                    msg = format_dhcp_event_message(mac, ip, hostname, "renew", expires_after)
-                    events.append((msg, "dhcp_renew"))
+                db.save_dhcp_event(lease.mac, lease.address, lease.hostname, "new", lease.expires_after)
+                logging.info(f"✅ DHCP New Lease: {lease.mac} -> {lease.address}")
+        
+            # Check renewals: waktu kadaluarsa maju (lease time di-update)
+            for old_lease, lease in changed_leases:
+                if lease.active and lease.expires_at - old_lease.expires_at > LEASE_EXPIRY_RESOLUTION:
+                    msg = format_dhcp_event_message(lease.mac, lease.address, lease.hostname, "renew", lease.expires_after)
+                    events.append((msg, "dhcp_renew", format_dhcp_summary(lease.mac, lease.address, lease.hostname)))
                     
-                    db.save_dhcp_event(mac, ip, hostname, "renew", expires_after)
-                    logging.info(f"✅ DHCP Renew: {mac}")
+                    db.save_dhcp_event(lease.mac, lease.address, lease.hostname, "renew", lease.expires_after)
+                    logging.info(f"✅ DHCP Renew: {lease.mac}")
         
-        # Detect releases (leases yang hilang)
-        for key in last_dhcp_leases:
-            if key not in current_dict:
-                old_lease = last_dhcp_leases[key]
-                mac = old_lease.get('mac-address', 'unknown')
-                ip = old_lease.get('address', 'unknown')
-                hostname = old_lease.get('host-name', '')
+            # Detect releases (leases yang hilang)
+            for lease in released:
+                msg = format_dhcp_event_message(lease.mac, lease.address, lease.hostname, "release")
+                events.append((msg, "dhcp_release", format_dhcp_summary(lease.mac, lease.address, lease.hostname)))
                 
-                msg = format_dhcp_event_message(mac, ip, hostname, "release")
-                events.append((msg, "dhcp_release"))
-                
-                db.save_dhcp_event(mac, ip, hostname, "release", None)
-                logging.info(f"✅ DHCP Release: {mac} ({ip})")
-        
-        # Update last state
-        last_dhcp_leases = current_dict
+                db.save_dhcp_event(lease.mac, lease.address, lease.hostname, "release", None)
+                logging.info(f"✅ DHCP Release: {lease.mac} ({lease.address})")
+            
+            _checkpoint(dhcp_state, new_leases, changed_leases, released)
         
     except Exception as e:
         logging.error(f"❌ Error checking DHCP events: {e}")
@@ -222,99 +308,89 @@ def format_interface_up_message(interface_name, speed):
     msg += f"⏰ Time: `{get_current_time()}`\n"
     return msg
 
-def check_interface_events(api):
+def _interface_status(iface):
+    """Status: "up" jika running dan tidak disabled"""
+    running = to_bool(iface.get('running', False))
+    disabled = to_bool(iface.get('disabled', False))
+    return "up" if (running and not disabled) else "down"
+
+def _interface_record(iface):
+    """Dict interface dari router -> InterfaceRecord"""
+    return InterfaceRecord(
+        iface.get('name'),
+        _interface_status(iface),
+        to_bool(iface.get('disabled', False)),
+        iface.get('link-speed', 'N/A'),
+        iface.get('rx-error', 0),
+        iface.get('tx-error', 0)
+    )
+
+async def check_interface_events(api):
     """
     Check untuk interface status changes (link up/down).
-    Return: List of tuples (message, event_type)
+    Return: List of tuples (message, event_type, summary), None jika data gagal diambil
     """
-    global last_interface_states
-    
     events = []
     
     try:
         # Ambil detail semua interface
-        interfaces = api.get_interfaces_detail()
+        interfaces = await api.get_interfaces_detail(INTERFACE_EVENT_FIELDS)
         
         if interfaces is None:
             logging.warning("⚠️ Gagal mengambil interface details")
-            return events
+            return None
         
         if not isinstance(interfaces, list):
             logging.warning("⚠️ Interface list bukan list")
             return events
         
-        # Buat dict untuk tracking (key = interface name)
-        current_dict = {}
-        for iface in interfaces:
-            iface_name = iface.get('name')
-            running = iface.get('running', False)
-            disabled = iface.get('disabled', False)
-            speed = iface.get('link-speed', 'N/A')
-            rx_error = iface.get('rx-error', 0)
-            tx_error = iface.get('tx-error', 0)
-            
-            # Status: "up" jika running dan tidak disabled
-            status = "up" if (running and not disabled) else "down"
-            
-            current_dict[iface_name] = {
-                'status': status,
-                'running': running,
-                'disabled': disabled,
-                'speed': speed,
-                'rx_error': rx_error,
-                'tx_error': tx_error
-            }
+        logging.debug(f"Interface check: {len(interfaces)} interface, {api.last_detail_requests} request ke router")
+
+        new_interfaces, status_changes, disappeared = interface_state.diff(
+            ((iface.get('name'), hash(_interface_status(iface)), iface) for iface in interfaces),
+            _interface_record
+        )
         
-        # Detect interface status changes
-        for iface_name, current_state in current_dict.items():
-            if iface_name not in last_interface_states:
-                # Interface baru detected
-                logging.info(f"ℹ️ New interface detected: {iface_name} ({current_state['status']})")
-            else:
-                # Check if status changed
-                last_state = last_interface_states[iface_name]
+        for iface in new_interfaces:
+            # Interface baru detected
+            logging.info(f"ℹ️ New interface detected: {iface.name} ({iface.status})")
+        
+        # Semua write DB di tick ini masuk satu transaksi
+        with db.batch():
+            # Detect interface status changes
+            for _, iface in status_changes:
+                if iface.status == "down":
+                    # Interface DOWN
+                    msg = format_interface_down_message(iface.name, iface.speed, iface.rx_error, iface.tx_error)
+                    events.append((msg, "interface_down", f"`{iface.name}`"))
+                    
+                    # Log ke database
+                    db.save_interface_event(
+                        iface.name, "down", "down",
+                        iface.speed,
+                        iface.rx_error,
+                        iface.tx_error,
+                        f"disabled={iface.disabled}"
+                    )
+                    logging.warning(f"⚠️ Interface DOWN: {iface.name}")
                 
-                if last_state['status'] != current_state['status']:
-                    if current_state['status'] == "down":
-                        # Interface DOWN
-                        msg = format_interface_down_message(
-                            iface_name,
-                            current_state['speed'],
-                            current_state['rx_error'],
-                            current_state['tx_error']
-                        )
-                        events.append((msg, "interface_down"))
-                        
-                        # Log ke database
-                        db.save_interface_event(
-                            iface_name, "down", "down",
-                            current_state['speed'],
-                            current_state['rx_error'],
-                            current_state['tx_error'],
-                            f"disabled={current_state['disabled']}"
-                        )
-                        logging.warning(f"⚠️ Interface DOWN: {iface_name}")
+                else:  # Interface UP (recovery)
+                    msg = format_interface_up_message(iface.name, iface.speed)
+                    events.append((msg, "interface_up", f"`{iface.name}` ({iface.speed})"))
                     
-                    else:  # Interface UP (recovery)
-                        msg = format_interface_up_message(iface_name, current_state['speed'])
-                        events.append((msg, "interface_up"))
-                        
-                        # Log ke database
-                        db.save_interface_event(
-                            iface_name, "up", "up",
-                            current_state['speed'],
-                            0, 0, "interface recovered"
-                        )
-                        logging.info(f"✅ Interface UP: {iface_name}")
-        
-        # Detect interfaces yang hilang dari last state
-        for iface_name in last_interface_states:
-            if iface_name not in current_dict:
-                # Interface hilang (mungkin dihapus)
-                logging.warning(f"⚠️ Interface disappeared: {iface_name}")
+                    # Log ke database
+                    db.save_interface_event(
+                        iface.name, "up", "up",
+                        iface.speed,
+                        0, 0, "interface recovered"
+                    )
+                    logging.info(f"✅ Interface UP: {iface.name}")
+            
+            _checkpoint(interface_state, new_interfaces, status_changes, disappeared)
         
-        # Update last state
-        last_interface_states = current_dict
+        # Interface yang hilang dari last state (mungkin dihapus)
+        for iface in disappeared:
+            logging.warning(f"⚠️ Interface disappeared: {iface.name}")
         
     except Exception as e:
         logging.error(f"❌ Error checking interface events: {e}")
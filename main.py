@@ -1,13 +1,24 @@
 import logging
 import asyncio
+import os
 from telegram import Update
-from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
+from telegram.ext import ApplicationBuilder, CallbackQueryHandler, CommandHandler, ContextTypes
 
 import config
-from core.router_api import RouterAPI
-from core.database import Database
-from handlers.commands import traffic_handler, backup_handler, dhcp_handler, hotspot_handler, interface_handler
-from handlers.events import check_hotspot_events, check_dhcp_events, check_interface_events
+from core.router_api import api, ERROR_COUNTER_KEYS
+from core.sampler import sampler
+from core.notifier import notifier
+from core.scheduler import scheduler
+from core.backup import backup_runner, BackupError
+from core.backup_store import backup_store
+from core.router_api import BackupTooLarge
+from core.recorder import ResponseRecorder
+from core.metrics import metrics, MetricsServer
+from core.watchdog import watchdog
+from handlers.commands import traffic_handler, backup_handler, dhcp_handler, hotspot_handler, interface_handler, rate_handler, find_handler, stats_handler, profile_handler, page_callback
+from handlers.commands import TRAFFIC_FIELDS, INTERFACE_FIELDS
+from handlers.events import check_hotspot_events, check_dhcp_events, check_interface_events, restore_detector_state, INTERFACE_EVENT_FIELDS
+from handlers.events import db
 from utils.formatter import format_bytes
 
 # Setup Logging
@@ -15,29 +26,85 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
+# httpx log setiap request di level INFO, terlalu ramai untuk polling beberapa detik sekali
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
-# Inisialisasi API dan DB
-api = RouterAPI()
-db = Database()
+# Arsip backup memakai koneksi DB bersama (handlers.events.db), RouterAPI dari core.router_api
+backup_store.db = db
+
+# Endpoint Prometheus lokal, aktif jika METRICS_PORT diset
+metrics_server = MetricsServer()
+
+# Property interface yang diambil saat sampling trafik (.proplist).
+# Superset dari field /interface yang dipakai detector dan command, supaya hasil sampling
+# di cache RouterAPI bisa langsung dipakai ulang oleh mereka.
+SNAPSHOT_FIELDS = list(dict.fromkeys([
+    'name', 'type', *TRAFFIC_FIELDS, *INTERFACE_EVENT_FIELDS, *INTERFACE_FIELDS, *ERROR_COUNTER_KEYS
+]))
 
 async def collect_traffic_job(context: ContextTypes.DEFAULT_TYPE):
     """
-    Job otomatis yang berjalan berkala untuk menyimpan snapshot trafik ke SQLite.
-    Data ini yang digunakan untuk menghitung selisih /traffic 1h, 1d, 1m.
+    Job sampling trafik setiap beberapa detik.
+    Counter disimpan di ring buffer memori (untuk /rate), dan hanya titik downsampled
+    (tiap TRAFFIC_FLUSH_INTERVAL) yang disimpan ke SQLite untuk /traffic 1h, 1d, 1m.
     """
-    logging.info("Mengambil snapshot trafik harian...")
-    interfaces = api.get_interfaces()
+    logging.debug("Sampling trafik interface...")
+    # Selalu request baru: sample diberi timestamp saat ini, hasil cache bisa berumur satu
+    # interval sampling (rate jadi 0 / dua kali lipat). Hasilnya tetap mengisi cache.
+    interfaces = await api.get_interfaces(SNAPSHOT_FIELDS, max_age=0)
     
     if interfaces and isinstance(interfaces, list):
-        for iface in interfaces:
-            name = iface.get('name')
-            rx = int(iface.get('rx-byte', 0))
-            tx = int(iface.get('tx-byte', 0))
-            db.save_snapshot(name, rx, tx)
-        logging.info(f"Berhasil menyimpan snapshot untuk {len(interfaces)} interface.")
+        sampler.record(interfaces)
+        if sampler.flush_due():
+            # Satu transaksi + satu timestamp untuk seluruh interface
+            snapshot_id = db.save_snapshots(sampler.flush_points(), sampler.last_sample_time)
+            logging.info(f"Berhasil menyimpan snapshot {snapshot_id} untuk {len(interfaces)} interface.")
+        # Hasil dipakai scheduler (metrics job_runs_total): None = gagal, [] = sukses tanpa event
+        return []
     else:
         logging.error("Gagal mengambil data interface untuk snapshot.")
 
+async def prune_traffic_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Job harian untuk menerapkan retensi traffic history.
+    Sample mentah lama dihapus, data lama tetap tersedia di tabel rollup.
+    """
+    try:
+        deleted = db.prune_traffic_history()
+        logging.info(f"Retensi trafik: {deleted} row lama dihapus.")
+    except Exception as e:
+        logging.error(f"❌ Error in traffic retention job: {e}")
+
+async def backup_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Job backup terjadwal: backup router dan arsipkan di BackupStore.
+    File hanya dikirim ke ALLOWED_USERS jika isinya berubah dari backup terakhir.
+    """
+    try:
+        async with backup_runner.run() as backup:
+            if not backup['changed']:
+                logging.info(f"Backup terjadwal: konfigurasi tidak berubah ({backup['sha256'][:12]}), tidak dikirim")
+                return
+            if not config.SEND_TO_ALLOWED_USERS:
+                return
+            filename = os.path.basename(backup['name'])
+            for user_id in config.ALLOWED_USERS:
+                with open(backup['path'], 'rb') as f:
+                    await context.bot.send_document(
+                        chat_id=user_id,
+                        document=f,
+                        filename=filename,
+                        caption=f"💾 **Backup Terjadwal**\n"
+                                f"Ukuran: `{format_bytes(backup['size'])}`\n"
+                                f"SHA256: `{backup['sha256'][:16]}`",
+                        parse_mode='Markdown'
+                    )
+            logging.info(f"✅ Backup terjadwal dikirim: {filename} ({format_bytes(backup['size'])})")
+    except (BackupError, BackupTooLarge) as e:
+        logging.error(f"❌ Backup terjadwal gagal: {e}")
+    except Exception as e:
+        logging.error(f"❌ Error in backup job: {e}")
+
 async def check_hotspot_job(context: ContextTypes.DEFAULT_TYPE):
     """
     Job untuk monitoring hotspot login/logout events.
@@ -45,22 +112,13 @@ async def check_hotspot_job(context: ContextTypes.DEFAULT_TYPE):
     """
     try:
         logging.debug("Checking hotspot events...")
-        events = check_hotspot_events(api)
+        events = await check_hotspot_events(api)
         
         if events and config.NOTIFICATION_ENABLED:
-            for message, event_type in events:
-                # Kirim notifikasi ke semua ALLOWED_USERS
-                if config.SEND_TO_ALLOWED_USERS:
-                    for user_id in config.ALLOWED_USERS:
-                        try:
-                            await context.bot.send_message(
-                                chat_id=user_id,
-                                text=message,
-                                parse_mode='Markdown'
-                            )
-                            logging.info(f"✅ Notification sent to {user_id}: {event_type}")
-                        except Exception as e:
-                            logging.error(f"❌ Failed to send notification to {user_id}: {e}")
+            # Hanya antrikan, pengiriman dilakukan worker dispatcher
+            notifier.notify(events)
+        # Hasil dipakai scheduler adaptif: None = gagal, [] = tidak ada perubahan
+        return events
     except Exception as e:
         logging.error(f"❌ Error in hotspot job: {e}")
 
@@ -71,22 +129,13 @@ async def check_dhcp_job(context: ContextTypes.DEFAULT_TYPE):
     """
     try:
         logging.debug("Checking DHCP events...")
-        events = check_dhcp_events(api)
+        events = await check_dhcp_events(api)
         
         if events and config.NOTIFICATION_ENABLED:
-            for message, event_type in events:
-                # Kirim notifikasi ke semua ALLOWED_USERS
-                if config.SEND_TO_ALLOWED_USERS:
-                    for user_id in config.ALLOWED_USERS:
-                        try:
-                            await context.bot.send_message(
-                                chat_id=user_id,
-                                text=message,
-                                parse_mode='Markdown'
-                            )
-                            logging.info(f"✅ Notification sent to {user_id}: {event_type}")
-                        except Exception as e:
-                            logging.error(f"❌ Failed to send notification to {user_id}: {e}")
+            # Hanya antrikan, pengiriman dilakukan worker dispatcher
+            notifier.notify(events)
+        # Hasil dipakai scheduler adaptif: None = gagal, [] = tidak ada perubahan
+        return events
     except Exception as e:
         logging.error(f"❌ Error in DHCP job: {e}")
 
@@ -96,22 +145,13 @@ async def check_interface_job(context: ContextTypes.DEFAULT_TYPE):
     """
     try:
         logging.debug("Checking interface events...")
-        events = check_interface_events(api)
+        events = await check_interface_events(api)
         
         if events and config.NOTIFICATION_ENABLED:
-            for message, event_type in events:
-                # Kirim notifikasi ke semua ALLOWED_USERS
-                if config.SEND_TO_ALLOWED_USERS:
-                    for user_id in config.ALLOWED_USERS:
-                        try:
-                            await context.bot.send_message(
-                                chat_id=user_id,
-                                text=message,
-                                parse_mode='Markdown'
-                            )
-                            logging.info(f"✅ Notification sent to {user_id}: {event_type}")
-                        except Exception as e:
-                            logging.error(f"❌ Failed to send notification to {user_id}: {e}")
+            # Hanya antrikan, pengiriman dilakukan worker dispatcher
+            notifier.notify(events)
+        # Hasil dipakai scheduler adaptif: None = gagal, [] = tidak ada perubahan
+        return events
     except Exception as e:
         logging.error(f"❌ Error in interface job: {e}")
 
@@ -119,57 +159,117 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
     """Log error yang terjadi pada bot."""
     logging.error(f"Exception while handling an update: {context.error}")
 
+async def startup(application):
+    """Muat state detector dari checkpoint, aktifkan rekaman response (jika diset), mulai worker notifikasi, endpoint metrics dan watchdog event loop setelah bot siap."""
+    restore_detector_state()
+    if getattr(config, 'ROUTER_RECORD_FILE', None):
+        api.recorder = ResponseRecorder()
+        logging.info(f"🎥 Merekam response router ke {api.recorder.filename} ({', '.join(sorted(api.recorder.paths))})")
+    notifier.start(application.bot)
+    if await metrics_server.start():
+        logging.info(f"📊 Metrics Prometheus di http://{metrics_server.host}:{metrics_server.port}/metrics")
+    if watchdog.start():
+        logging.info(f"🐶 Watchdog event loop aktif (threshold {watchdog.threshold}s)")
+
+async def shutdown(application):
+    """Hentikan watchdog dan endpoint metrics, kirim sisa notifikasi, tutup HTTP connection pool ke router, file rekaman dan koneksi DB saat bot berhenti."""
+    await watchdog.stop()
+    await metrics_server.stop()
+    await notifier.stop()
+    await api.aclose()
+    if api.recorder is not None:
+        api.recorder.close()
+    db.close()
+
 def main():
     # 1. Bangun Application
-    application = ApplicationBuilder().token(config.BOT_TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(config.BOT_TOKEN)
+        .post_init(startup)
+        .post_shutdown(shutdown)
+        .build()
+    )
 
     # 2. Daftarkan Command Handlers
     application.add_handler(CommandHandler("traffic", traffic_handler))
-    application.add_handler(CommandHandler("backup", backup_handler))
+    # /backup bisa berjalan sampai BACKUP_TIMEOUT + download: block=False supaya command lain
+    # tidak mengantri di belakangnya
+    application.add_handler(CommandHandler("backup", backup_handler, block=False))
     application.add_handler(CommandHandler("dhcp", dhcp_handler))
     application.add_handler(CommandHandler("hotspot", hotspot_handler))
     application.add_handler(CommandHandler("interface", interface_handler))
+    application.add_handler(CommandHandler("rate", rate_handler))
+    application.add_handler(CommandHandler("find", find_handler))
+    application.add_handler(CommandHandler("stats", stats_handler))
+    # /profile menunggu sampai N detik: block=False supaya update lain tetap diproses
+    # (dan ikut terprofil) selama profiling berjalan
+    application.add_handler(CommandHandler("profile", profile_handler, block=False))
+    application.add_handler(CallbackQueryHandler(page_callback, pattern=r"^page:"))
 
     # 3. Setup Job Queue (Background Task)
     job_queue = application.job_queue
     
-    # Traffic snapshot - Jalankan setiap 1 jam (3600 detik)
+    # Traffic sampling - Jalankan setiap TRAFFIC_SAMPLE_INTERVAL detik (interval tetap, tanpa overlap)
     # Jalankan pertama kali 10 detik setelah bot nyala
-    job_queue.run_repeating(
+    scheduler.add(
+        job_queue,
         collect_traffic_job,
-        interval=3600,
+        name="traffic_snapshot",
+        interval=sampler.interval,
         first=10,
-        name="traffic_snapshot"
+        adaptive=False
+    )
+    
+    # Retensi traffic history - Jalankan setiap 1 hari
+    job_queue.run_repeating(
+        metrics.timed("job_duration_seconds", job="traffic_retention")(prune_traffic_job),
+        interval=86400,
+        first=60,
+        name="traffic_retention"
     )
+
+    # Backup terjadwal ke arsip lokal (0 = nonaktif)
+    backup_interval = getattr(config, 'BACKUP_SCHEDULE_INTERVAL', 86400)
+    if backup_interval:
+        job_queue.run_repeating(
+            metrics.timed("job_duration_seconds", job="router_backup")(backup_job),
+            interval=backup_interval,
+            first=300,
+            name="router_backup"
+        )
     
-    # Hotspot monitoring - Jalankan setiap CHECK_INTERVAL detik
+    # Hotspot monitoring - Interval dasar HOTSPOT_CHK_INTERVAL detik, adaptif (lihat core/scheduler.py)
     # Jalankan pertama kali 5 detik setelah bot nyala
     hotspot_interval = getattr(config, 'HOTSPOT_CHK_INTERVAL', 30)
-    job_queue.run_repeating(
+    scheduler.add(
+        job_queue,
         check_hotspot_job,
+        name="hotspot_check",
         interval=hotspot_interval,
-        first=5,
-        name="hotspot_check"
+        first=5
     )
     
-    # DHCP monitoring - Jalankan setiap CHECK_INTERVAL detik
+    # DHCP monitoring - Interval dasar DHCP_CHK_INTERVAL detik, adaptif
     # Jalankan pertama kali 6 detik setelah bot nyala
     dhcp_interval = getattr(config, 'DHCP_CHK_INTERVAL', 30)
-    job_queue.run_repeating(
+    scheduler.add(
+        job_queue,
         check_dhcp_job,
+        name="dhcp_check",
         interval=dhcp_interval,
-        first=6,
-        name="dhcp_check"
+        first=6
     )
     
-    # Interface monitoring - Jalankan setiap CHECK_INTERVAL detik
+    # Interface monitoring - Interval dasar INTERFACE_CHK_INTERVAL detik, adaptif
     # Jalankan pertama kali 7 detik setelah bot nyala
     interface_interval = getattr(config, 'INTERFACE_CHK_INTERVAL', 30)
-    job_queue.run_repeating(
+    scheduler.add(
+        job_queue,
         check_interface_job,
+        name="interface_check",
         interval=interface_interval,
-        first=7,
-        name="interface_check"
+        first=7
     )
 
     # 4. Tambahkan Error Handler
@@ -177,9 +277,16 @@ def main():
 
     # 5. Jalankan Bot
     logging.info("🚀 MikroTik Bot started...")
+    logging.info(f"✅ Traffic sample interval: {sampler.interval}s (flush tiap {sampler.flush_interval}s)")
     logging.info(f"✅ Hotspot check interval: {hotspot_interval}s")
     logging.info(f"✅ DHCP check interval: {dhcp_interval}s")
     logging.info(f"✅ Interface check interval: {interface_interval}s")
+    if backup_interval:
+        logging.info(f"✅ Backup terjadwal tiap {backup_interval}s, arsip di {backup_store.root}")
+    logging.info(
+        f"✅ Adaptive polling: {getattr(config, 'ADAPTIVE_MIN_INTERVAL', 'off')}s - "
+        f"{getattr(config, 'ADAPTIVE_MAX_INTERVAL', 'off')}s"
+    )
     logging.info(f"✅ Notifications: {'ENABLED' if config.NOTIFICATION_ENABLED else 'DISABLED'}")
     
     application.run_polling()
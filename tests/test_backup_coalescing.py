@@ -0,0 +1,91 @@
+"""
+/backup yang datang bersamaan harus memakai satu proses backup router yang sama
+(BackupRunner.run), bukan memicu backup baru per command.
+
+Jalankan dari root repo:
+    python -m pytest tests
+"""
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_router import SimulatedRouter, ensure_config
+
+ensure_config()
+
+import config  # noqa: E402
+
+
+class FakeMessage:
+    """Pengganti telegram.Message: catat teks dan dokumen yang dikirim handler"""
+    def __init__(self, log):
+        self.log = log
+
+    async def reply_text(self, text, **kwargs):
+        self.log.append(("text", text))
+        return FakeMessage(self.log)
+
+    async def edit_text(self, text, **kwargs):
+        self.log.append(("edit", text))
+
+    async def delete(self):
+        pass
+
+    async def reply_document(self, document, filename, **kwargs):
+        self.log.append(("document", len(document.read())))
+
+
+def make_update(log):
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(id=config.ALLOWED_USERS[0]),
+        callback_query=None,
+        message=FakeMessage(log),
+    )
+
+
+@pytest.fixture
+def commands(tmp_path, monkeypatch):
+    # handlers.commands membuat traffic.db di cwd saat di-import
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("handlers.commands")
+
+
+def test_concurrent_backup_commands_share_one_router_backup(commands, tmp_path, monkeypatch):
+    from core.backup import BackupRunner
+    from core.backup_store import BackupStore
+    from core.database import Database
+    from core.router_api import RouterAPI
+
+    sim = SimulatedRouter(interfaces=2, leases=0, sessions=0, backup_size=64 * 1024, backup_write_time=0.3)
+    router = sim.serve()
+    api = RouterAPI(router_url=router.url)
+    store = BackupStore(db=Database(str(tmp_path / "backup.db")), root=str(tmp_path / "backups"))
+    runner = BackupRunner(api=api, store=store, poll_interval=0.05)
+    monkeypatch.setattr(commands, "backup_runner", runner)
+    monkeypatch.setattr(commands, "api", api)
+
+    first, second = [], []
+    context = SimpleNamespace(args=["force"])
+
+    async def run():
+        try:
+            await asyncio.gather(
+                commands.backup_handler(make_update(first), context),
+                commands.backup_handler(make_update(second), context),
+            )
+        finally:
+            await api.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        router.stop()
+        store.db.close()
+
+    assert runner.runs == 1
+    assert runner.coalesced == 1
+    assert sim._next_file == 1  # router hanya diminta save backup sekali
+    for log in (first, second):
+        assert ("document", 64 * 1024) in log
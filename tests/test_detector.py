@@ -0,0 +1,54 @@
+"""
+DetectorState.diff dengan key dobel di satu poll (mis. MAC yang sama punya lease di dua
+DHCP server / VLAN): perubahan dilaporkan sekali, poll berikutnya yang sama harus diam.
+
+Jalankan dari root repo:
+    python -m pytest tests
+"""
+from collections import namedtuple
+
+from core.detector import DetectorState
+
+Record = namedtuple('Record', ['key', 'v'])
+
+
+def make_state():
+    return DetectorState("test", Record, key_of=lambda r: r.key, fingerprint_of=lambda r: hash(r.v))
+
+
+def items(*rows):
+    return [(row['key'], hash(row['v']), row) for row in rows]
+
+
+def make_record(row):
+    return Record(row['key'], row['v'])
+
+
+def test_duplicate_key_changed_first_is_reported_once():
+    state = make_state()
+    state.diff(items({'key': 'aa:bb', 'v': 1}), make_record)
+
+    poll = items({'key': 'aa:bb', 'v': 2}, {'key': 'aa:bb', 'v': 1})
+    new, changed, removed = state.diff(poll, make_record)
+    assert (new, changed, removed) == ([], [(Record('aa:bb', 1), Record('aa:bb', 2))], [])
+    assert state.records['aa:bb'] == Record('aa:bb', 2)
+
+    # Poll yang sama lagi: tidak ada event dan state tidak berubah
+    assert state.diff(poll, make_record) == ([], [], [])
+    assert state.records['aa:bb'] == Record('aa:bb', 2)
+
+
+def test_duplicate_key_unchanged_first_is_quiet():
+    state = make_state()
+    state.diff(items({'key': 'aa:bb', 'v': 1}), make_record)
+
+    poll = items({'key': 'aa:bb', 'v': 1}, {'key': 'aa:bb', 'v': 2})
+    assert state.diff(poll, make_record) == ([], [], [])
+    assert state.diff(poll, make_record) == ([], [], [])
+    assert state.records['aa:bb'] == Record('aa:bb', 1)
+
+
+def test_duplicate_new_key_is_reported_once():
+    state = make_state()
+    new, changed, removed = state.diff(items({'key': 'aa:bb', 'v': 1}, {'key': 'aa:bb', 'v': 2}), make_record)
+    assert (new, changed, removed) == ([Record('aa:bb', 1)], [], [])
@@ -8,6 +8,10 @@ def restricted(func):
         user_id = update.effective_user.id
         if user_id not in config.ALLOWED_USERS:
             print(f"Unauthorized access denied for {user_id}.")
+            if update.callback_query is not None:
+                # Tombol inline tidak punya update.message untuk dibalas
+                await update.callback_query.answer("🚫 Akses Ditolak.", show_alert=True)
+                return
             # Tambahkan await di sini juga!
             await update.message.reply_text(
                 f"🚫 Akses Ditolak. ID Anda ({user_id}) tidak terdaftar."
@@ -5,4 +5,48 @@ def format_bytes(size_bytes):
     i = int(math.floor(math.log(size_bytes, 1024)))
     p = math.pow(1024, i)
     s = round(size_bytes / p, 2)
-    return f"{s} {size_name[i]}"
\ No newline at end of file
+    return f"{s} {size_name[i]}"
+
+def format_bps(bits_per_second):
+    if bits_per_second != bits_per_second:  # NaN = rate belum tersedia
+        return "-"
+    if bits_per_second < 1: return "0 bps"
+    size_name = ("bps", "Kbps", "Mbps", "Gbps", "Tbps")
+    import math
+    i = min(int(math.floor(math.log(bits_per_second, 1000))), len(size_name) - 1)
+    p = math.pow(1000, i)
+    s = round(bits_per_second / p, 2)
+    return f"{s} {size_name[i]}"
+
+def telegram_length(text):
+    """Panjang teks versi Telegram (dihitung dalam UTF-16 code unit, emoji bisa 2-3 unit)"""
+    return len(text.encode('utf-16-le')) // 2
+
+def split_lines(header, lines, limit=4096):
+    """
+    Gabungkan header + baris-baris menjadi beberapa pesan yang masing-masing
+    tidak melebihi limit karakter (batas pesan Telegram 4096).
+    """
+    chunks = []
+    current = header
+    current_length = header_length = telegram_length(header)
+    for line in lines:
+        line_length = telegram_length(line) + 1
+        if current_length + line_length > limit and current != header:
+            chunks.append(current)
+            current, current_length = header, header_length
+        current += line + "\n"
+        current_length += line_length
+    if current != header or not chunks:
+        chunks.append(current)
+    return chunks
+
+def format_seconds(seconds):
+    """Durasi singkat untuk statistik: 0.42ms, 12.3ms, 1.25s, 3m 20s, 2h 5m"""
+    if seconds < 1:
+        return f"{seconds * 1000:.3g}ms"
+    if seconds < 60:
+        return f"{seconds:.3g}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m {int(seconds % 60)}s"
+    return f"{int(seconds // 3600)}h {int(seconds % 3600 // 60)}m"
\ No newline at end of file
@@ -0,0 +1,57 @@
+# utils/pagination.py
+import itertools
+import time
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+import config
+
+class PageCache:
+    """
+    Snapshot hasil command (list row) per chat untuk pagination.
+    Pindah halaman dilayani dari snapshot ini, tanpa request ulang ke router.
+    Satu snapshot per (chat, jenis); snapshot lama diganti saat command dijalankan lagi.
+    """
+    def __init__(self, ttl=None):
+        self.ttl = ttl or getattr(config, 'PAGE_CACHE_TTL', 300)
+        self.snapshots = {}  # (chat_id, kind) -> (token, created_at, rows)
+        self._tokens = itertools.count(1)
+
+    def put(self, chat_id, kind, rows):
+        """Simpan snapshot, return token yang disertakan di callback data tombol"""
+        self.prune()
+        token = format(next(self._tokens), 'x')
+        self.snapshots[(chat_id, kind)] = (token, time.monotonic(), rows)
+        return token
+
+    def get(self, chat_id, kind, token):
+        """Rows snapshot, None jika sudah kedaluwarsa atau sudah diganti snapshot baru"""
+        snapshot = self.snapshots.get((chat_id, kind))
+        if snapshot is None or snapshot[0] != token:
+            return None
+        if time.monotonic() - snapshot[1] > self.ttl:
+            del self.snapshots[(chat_id, kind)]
+            return None
+        return snapshot[2]
+
+    def prune(self):
+        now = time.monotonic()
+        for key in [key for key, (_, created_at, _) in self.snapshots.items() if now - created_at > self.ttl]:
+            del self.snapshots[key]
+
+def page_bounds(total, page, page_size):
+    """(page, pages, start, end) dengan page dibatasi ke halaman yang ada (mulai dari 0)"""
+    pages = max(1, -(-total // page_size))
+    page = min(max(page, 0), pages - 1)
+    start = page * page_size
+    return page, pages, start, min(start + page_size, total)
+
+def page_keyboard(kind, token, page, pages):
+    """Tombol ◀️ / halaman / ▶️ untuk callback "page:<kind>:<token>:<page>", None jika cuma satu halaman"""
+    if pages <= 1:
+        return None
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("◀️", callback_data=f"page:{kind}:{token}:{page - 1}"))
+    buttons.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=f"page:{kind}:{token}:{page}"))
+    if page < pages - 1:
+        buttons.append(InlineKeyboardButton("▶️", callback_data=f"page:{kind}:{token}:{page + 1}"))
+    return InlineKeyboardMarkup([buttons])